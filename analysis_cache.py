@@ -0,0 +1,160 @@
+"""Content-addressed cache for symptom analysis results.
+
+Analyses are keyed on a canonical form of the request (sorted, case-folded
+symptoms plus age bucket, gender and mode) so repeat queries for the same
+symptom set are served from memory instead of another Gemini round-trip.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Age ranges used when building cache keys
+AGE_BUCKETS = [
+    (2, 'infant'),
+    (13, 'child'),
+    (18, 'teen'),
+    (40, 'adult'),
+    (65, 'middle-aged'),
+]
+
+
+def age_bucket(age):
+    """Map a raw age value onto a coarse bucket name"""
+    try:
+        years = int(float(age))
+    except (TypeError, ValueError):
+        return 'unknown'
+    if years < 0:
+        return 'unknown'
+    for upper, name in AGE_BUCKETS:
+        if years < upper:
+            return name
+    return 'senior'
+
+
+def canonical_symptoms(symptoms):
+    """Return symptoms stripped, case-folded, de-duplicated and sorted"""
+    cleaned = set()
+    for symptom in symptoms or []:
+        text = ' '.join(str(symptom).split()).casefold()
+        if text:
+            cleaned.add(text)
+    return sorted(cleaned)
+
+
+def make_cache_key(symptoms, age='', gender='', mode='', extra=None):
+    """Build a content-addressed key for an analysis request"""
+    payload = [
+        canonical_symptoms(symptoms),
+        age_bucket(age),
+        str(gender or '').strip().casefold(),
+        str(mode or '').strip().casefold(),
+        extra,
+    ]
+    encoded = json.dumps(payload, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """Thread-safe LRU + TTL cache with an optional SQLite backing store"""
+
+    def __init__(self, max_entries=256, ttl=3600, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS analysis_cache '
+                '(key TEXT PRIMARY KEY, stored_at REAL, value TEXT)')
+            self._db.commit()
+
+    def get(self, key):
+        """Return a cached analysis, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(value)
+                del self._entries[key]
+                self.expirations += 1
+
+            entry = self._load(key, now)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._store(key, entry[0], entry[1])
+            self.hits += 1
+            return json.loads(entry[1])
+
+    def put(self, key, analysis):
+        """Store an analysis result under the given key"""
+        value = json.dumps(analysis, separators=(',', ':'))
+        now = time.time()
+        with self._lock:
+            self._store(key, now, value)
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO analysis_cache VALUES (?, ?, ?)',
+                    (key, now, value))
+                self._db.execute(
+                    'DELETE FROM analysis_cache WHERE stored_at < ?',
+                    (now - self.ttl,))
+                self._db.commit()
+
+    def clear(self):
+        """Drop every cached entry, including the backing store"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM analysis_cache')
+                self._db.commit()
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'persistent': self._db is not None,
+            }
+
+    def _store(self, key, stored_at, value):
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, key, now):
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            'SELECT stored_at, value FROM analysis_cache WHERE key = ?',
+            (key,)).fetchone()
+        if row is None:
+            return None
+        if now - row[0] > self.ttl:
+            self.expirations += 1
+            return None
+        return row
@@ -0,0 +1,244 @@
+"""Declarative schema for analysis responses, compiled into a validator.
+
+The shape of an analysis is declared once with `Object`, `ListOf`,
+`String`, `Number` and `Boolean`. `compile_schema` turns that declaration
+into nested closures at startup, so checking a response is a straight walk
+over its fields with no per-call setup. Every response is coerced into the
+declared shape:
+
+- unknown keys are dropped and missing or unusable fields take their default
+- numbers given as strings ("85", "85%") are converted, then clamped to range
+- strings are stripped and truncated, lists capped, bad list items dropped
+- a field without a default is required; if it cannot be recovered the whole
+  response is rejected with `SchemaError`
+
+`ANALYSIS_SCHEMA` describes the full munal.py response; `BASIC_ANALYSIS_SCHEMA`
+is the smaller maya.py response. Both require at least one usable disease, so
+an answer without one is rejected rather than passed off as a real analysis.
+munal.py builds its fallback answer from `DEFAULT_DISEASES` and the other
+fields' defaults.
+"""
+import math
+
+_MISSING = object()
+
+
+class SchemaError(ValueError):
+    """Raised when a response cannot be coerced into the schema"""
+
+
+def _clone(value):
+    """Copy nested lists and dicts of JSON values, much faster than deepcopy"""
+    if isinstance(value, list):
+        return [_clone(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _clone(item) for key, item in value.items()}
+    return value
+
+
+def _default_factory(default):
+    """Return a callable producing a fresh copy of a default value"""
+    if default is _MISSING or not isinstance(default, (list, dict)):
+        return lambda: default
+    if isinstance(default, list) and all(
+            isinstance(item, (str, int, float, bool)) for item in default):
+        return lambda: list(default)
+    return lambda: _clone(default)
+
+
+class String:
+    """Text, stripped and truncated; numbers are converted"""
+
+    def __init__(self, max_length=500, default=_MISSING):
+        self.max_length = max_length
+        self.default = default
+
+    def compile(self):
+        max_length = self.max_length
+        default = _default_factory(self.default)
+
+        def check(value):
+            if isinstance(value, str):
+                value = value.strip()
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = str(value)
+            else:
+                return default()
+            return value[:max_length] if value else default()
+        return check
+
+
+class Number:
+    """Number clamped to a range; numeric strings are converted"""
+
+    def __init__(self, minimum, maximum, default=_MISSING, integer=True):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.default = default
+        self.integer = integer
+
+    def compile(self):
+        lo, hi, integer = self.minimum, self.maximum, self.integer
+        default = _default_factory(self.default)
+
+        def check(value):
+            if isinstance(value, bool):
+                return default()
+            if isinstance(value, str):
+                try:
+                    value = float(value.strip().rstrip('%'))
+                except ValueError:
+                    return default()
+            elif not isinstance(value, (int, float)):
+                return default()
+            if math.isnan(value):
+                return default()
+            value = min(hi, max(lo, value))
+            return int(round(value)) if integer else value
+        return check
+
+
+class Boolean:
+    """True/false, also from yes/no style strings and numbers"""
+
+    TRUE = frozenset(('true', 'yes', 'y', '1'))
+    FALSE = frozenset(('false', 'no', 'n', '0'))
+
+    def __init__(self, default=_MISSING):
+        self.default = default
+
+    def compile(self):
+        true, false = self.TRUE, self.FALSE
+        default = _default_factory(self.default)
+
+        def check(value):
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, (int, float)):
+                return bool(value)
+            if isinstance(value, str):
+                word = value.strip().lower()
+                if word in true:
+                    return True
+                if word in false:
+                    return False
+            return default()
+        return check
+
+
+class ListOf:
+    """List of items of one type, capped in length"""
+
+    def __init__(self, item, max_items=10, min_items=0, default=_MISSING):
+        self.item = item
+        self.max_items = max_items
+        self.min_items = min_items
+        self.default = default
+
+    def compile(self):
+        check_item = self.item.compile()
+        max_items, min_items = self.max_items, self.min_items
+        default = _default_factory(self.default)
+
+        def check(value):
+            if value is None:
+                fallback = default()
+                if fallback is _MISSING and not min_items:
+                    return []
+                return fallback
+            if not isinstance(value, list):
+                value = [value]  # a lone item where a list was expected
+            items = [item for item in map(check_item, value[:max_items])
+                     if item is not _MISSING]
+            if len(items) < max_items < len(value):
+                # Some items were dropped; top up from the rest
+                for item in map(check_item, value[max_items:]):
+                    if item is not _MISSING:
+                        items.append(item)
+                        if len(items) == max_items:
+                            break
+            if len(items) < min_items:
+                return default()
+            return items
+        return check
+
+
+class Object:
+    """Fixed set of fields; unknown keys are dropped"""
+
+    def __init__(self, fields, default=_MISSING):
+        self.fields = fields
+        self.default = default
+
+    def compile(self):
+        fields = tuple((key, spec.compile()) for key, spec in self.fields.items())
+        default = _default_factory(self.default)
+
+        def check(value):
+            if not isinstance(value, dict):
+                return default()
+            result = {}
+            for key, check_field in fields:
+                field = check_field(value.get(key))
+                if field is _MISSING:
+                    return default()
+                result[key] = field
+            return result
+        return check
+
+
+def compile_schema(schema):
+    """Compile a top-level Object into validate(data) -> coerced dict"""
+    check = schema.compile()
+
+    def validate(data):
+        result = check(data)
+        if result is _MISSING:
+            raise SchemaError('Response does not match the analysis schema')
+        return result
+    return validate
+
+
+DEFAULT_DISEASES = [{
+    'name': 'Analysis Unavailable',
+    'confidence': 0,
+    'description': 'Unable to analyze symptoms at this time. Please try '
+                   'again or consult a healthcare provider.',
+    'risk_factors': ['N/A'],
+}]
+
+DISEASE = Object({
+    'name': String(max_length=200, default='Unknown Condition'),
+    'confidence': Number(0, 100, default=0),
+    'description': String(max_length=2000, default='No description available'),
+    'risk_factors': ListOf(String(), min_items=1,
+                           default=['No risk factors specified']),
+})
+
+ANALYSIS_SCHEMA = Object({
+    'diseases': ListOf(DISEASE, max_items=5, min_items=1),
+    'treatments': ListOf(String(), default=[
+        'Please consult a healthcare provider']),
+    'seek_medical_attention': Boolean(default=True),
+    'severity_level': Number(0, 100, default=50),
+    'preventive_measures': ListOf(String(), default=[
+        'Rest and maintain good hydration',
+        'Monitor symptoms for any changes',
+        'Practice good hygiene']),
+    'follow_up': ListOf(String(), default=[
+        'Schedule an appointment with your healthcare provider',
+        'Keep a symptom diary']),
+    'immediate_actions': ListOf(String(), default=[
+        'Contact your healthcare provider',
+        'Monitor your symptoms']),
+})
+
+BASIC_ANALYSIS_SCHEMA = Object({
+    'diseases': ListOf(Object({
+        'name': String(max_length=200),
+        'confidence': Number(0, 100, default=0),
+        'description': String(max_length=2000, default=''),
+    }), max_items=5, min_items=1),
+    'treatments': ListOf(String(), default=[]),
+    'seek_medical_attention': Boolean(default=True),
+})
@@ -0,0 +1,125 @@
+"""Microbenchmark: compiled analysis schema vs. the hand-written validator.
+
+Times the per-response cost of `compile_schema(ANALYSIS_SCHEMA)` against the
+validate_and_fix_analysis it replaced, on well-formed answers and on messy
+ones (string numbers, out-of-range values, unknown keys, long lists), and
+checks both agree on well-formed input.
+
+    python benchmarks/bench_analysis_schema.py --repeat 20000
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_schema import ANALYSIS_SCHEMA, compile_schema  # noqa: E402
+from llm_provider import MockProvider  # noqa: E402
+
+validate_analysis = compile_schema(ANALYSIS_SCHEMA)
+
+
+def legacy_default_response():
+    """The previous munal.py create_default_response"""
+    return {
+        "diseases": [
+            {
+                "name": "Analysis Unavailable",
+                "confidence": 0,
+                "description": "Unable to analyze symptoms at this time. Please try again or consult a healthcare provider.",
+                "risk_factors": ["N/A"]
+            }
+        ],
+        "treatments": ["Please consult a healthcare provider"],
+        "seek_medical_attention": True,
+        "severity_level": 50,
+        "preventive_measures": [
+            "Rest and maintain good hydration",
+            "Monitor symptoms for any changes",
+            "Practice good hygiene"
+        ],
+        "follow_up": [
+            "Schedule an appointment with your healthcare provider",
+            "Keep a symptom diary"
+        ],
+        "immediate_actions": [
+            "Contact your healthcare provider",
+            "Monitor your symptoms"
+        ]
+    }
+
+
+def legacy_validate(analysis):
+    """The previous munal.py validate_and_fix_analysis"""
+    default_response = legacy_default_response()
+    if not isinstance(analysis, dict):
+        return default_response
+    for key in default_response.keys():
+        if key not in analysis:
+            analysis[key] = default_response[key]
+    if not isinstance(analysis.get('diseases'), list) or not analysis['diseases']:
+        analysis['diseases'] = default_response['diseases']
+    for disease in analysis['diseases']:
+        if not isinstance(disease, dict):
+            continue
+        if 'name' not in disease:
+            disease['name'] = "Unknown Condition"
+        if 'confidence' not in disease:
+            disease['confidence'] = 0
+        if 'description' not in disease:
+            disease['description'] = "No description available"
+        if 'risk_factors' not in disease or not isinstance(disease['risk_factors'], list):
+            disease['risk_factors'] = ["No risk factors specified"]
+    return analysis
+
+
+def messy(analysis):
+    analysis = copy.deepcopy(analysis)
+    for disease in analysis['diseases']:
+        disease['confidence'] = f"{disease['confidence'] + 40}%"
+        disease['icd10'] = 'J11'
+        del disease['risk_factors']
+    analysis['severity_level'] = '85'
+    analysis['seek_medical_attention'] = 'yes'
+    analysis['treatments'] = [f"Step {i}" for i in range(40)]
+    analysis['notes'] = 'unknown key'
+    del analysis['follow_up']
+    return analysis
+
+
+def per_call(fn, inputs, repeat):
+    # Copy outside the timed loop: the legacy validator mutates its input
+    batches = [[copy.deepcopy(a) for a in inputs] for _ in range(repeat)]
+    start = time.perf_counter()
+    for batch in batches:
+        for analysis in batch:
+            fn(analysis)
+    return (time.perf_counter() - start) / (repeat * len(inputs)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5000)
+    args = parser.parse_args()
+
+    mock = MockProvider(latency=0)
+    clean = [json.loads(mock.response_for(str(i))) for i in range(20)]
+    for analysis in clean:
+        assert validate_analysis(copy.deepcopy(analysis)) == \
+            legacy_validate(copy.deepcopy(analysis))
+    dirty = [messy(a) for a in clean]
+
+    print(f"{'input':<10} {'legacy':>12} {'compiled':>12}")
+    for label, inputs in (('clean', clean), ('messy', dirty)):
+        legacy = per_call(legacy_validate, inputs, args.repeat)
+        compiled = per_call(validate_analysis, inputs, args.repeat)
+        print(f"{label:<10} {legacy:>9.1f} us {compiled:>9.1f} us")
+    print("\nlegacy passes messy input through unchecked (string confidence,"
+          " unknown keys, 40 treatments); compiled coerces it")
+
+
+if __name__ == '__main__':
+    main()
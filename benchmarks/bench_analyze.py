@@ -0,0 +1,130 @@
+"""Load test: drive /analyze under concurrency and report latency percentiles.
+
+Each simulated kiosk submits an analysis, long-polls its job until it
+finishes (or reads the /analyze/stream response to the end with --stream) and
+records the end-to-end time. Start the app against the mock provider to
+measure the serving path without spending Gemini quota:
+
+    LLM_PROVIDER=mock MOCK_LLM_LATENCY_MS=800 MOCK_LLM_JITTER_MS=200 python maya.py
+    python benchmarks/bench_analyze.py --concurrency 1 4 16 --requests 200
+
+By default every request uses a distinct symptom set so the analysis cache
+does not hide upstream cost; --distinct N cycles through N sets instead.
+"""
+import argparse
+import itertools
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+SYMPTOMS = ('Fever', 'Cough', 'Headache', 'Fatigue', 'Sore Throat',
+            'Nausea', 'Dizziness', 'Runny Nose', 'Body Aches', 'Chills')
+POLL_WAIT = 25  # seconds, matches MAX_POLL_WAIT in the apps
+
+
+def payload(i, distinct):
+    """Build the request body for the i-th request"""
+    combos = list(itertools.combinations(SYMPTOMS, 3))
+    key = i % distinct if distinct else i
+    symptoms = list(combos[key % len(combos)])
+    if key >= len(combos):
+        symptoms.append(f"Symptoms for {key // len(combos) + 1} days")
+    return {'name': f'Load test {i}', 'symptoms': symptoms, 'age': '35',
+            'gender': 'other', 'mode': 'list'}
+
+
+def post(url, body, timeout):
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode('utf-8'),
+        headers={'Content-Type': 'application/json'})
+    return urllib.request.urlopen(request, timeout=timeout)
+
+
+def analyze_job(base, body, timeout):
+    """Submit a job and long-poll it; return True on success"""
+    with post(base + '/analyze', body, timeout) as response:
+        job = json.load(response)
+    status_url = f"{base}{job['status_url']}?wait={POLL_WAIT}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(status_url, timeout=timeout) as response:
+                job = json.load(response)
+        except urllib.error.HTTPError:
+            return False
+        if job['status'] == 'done':
+            return True
+    return False
+
+
+def analyze_stream(base, body, timeout):
+    """Read an SSE analysis to the end; return True if it finished"""
+    with post(base + '/analyze/stream', body, timeout) as response:
+        for line in response:
+            if line.startswith(b'event: done'):
+                return True
+            if line.startswith(b'event: error'):
+                return False
+    return False
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1,
+                max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run(args, concurrency, offset):
+    call = analyze_stream if args.stream else analyze_job
+    base = args.url.rstrip('/')
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            ok = call(base, payload(offset + i, args.distinct), args.timeout)
+        except (OSError, ValueError, KeyError):
+            ok = False
+        return ok, time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(t * 1000 for ok, t in results if ok)
+    errors = sum(1 for ok, _ in results if not ok)
+    print(f"{concurrency:>11} {len(latencies):>6} {errors:>6} "
+          f"{len(results) / elapsed:>8.1f} "
+          f"{percentile(latencies, 50):>9.0f} {percentile(latencies, 95):>9.0f} "
+          f"{percentile(latencies, 99):>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=100,
+                        help='requests per concurrency level')
+    parser.add_argument('--distinct', type=int, default=0,
+                        help='distinct symptom sets to cycle (0 = all unique)')
+    parser.add_argument('--stream', action='store_true',
+                        help='use /analyze/stream instead of job polling')
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    mode = 'stream' if args.stream else 'job polling'
+    print(f"{args.url} ({mode}), {args.requests} requests per level")
+    print(f"{'concurrency':>11} {'ok':>6} {'errors':>6} {'req/s':>8} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for level, concurrency in enumerate(args.concurrency):
+        # Fresh symptom sets per level so earlier runs do not warm the cache
+        offset = 0 if args.distinct else level * args.requests
+        run(args, concurrency, offset)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""Fuzz and benchmark json_repair.extract_json against real-shaped answers.
+
+Builds analyses like the model returns and damages them in the ways model
+output gets damaged: markdown fences, prose with stray braces, trailing
+commas, raw newlines in strings, Python literals, truncation at *every*
+byte offset, and random single-character corruption. It reports, for
+each kind of damage, how many texts were recovered, how many were
+rejected with ValueError (nothing usable left, e.g. a cut inside the
+first disease) and how many came back wrong. It fails when:
+
+- a repairable variant does not come back equal to the original analysis
+- a truncated variant comes back as anything but a non-empty subset of it,
+  or is reported as intact
+- random corruption raises anything but ValueError or returns an empty
+  value
+
+tests/test_json_repair.py asserts the same properties. This script
+compares the recovery rate with the old first-`{`/last-`}` slice and
+reports parse throughput.
+
+    python benchmarks/bench_json_repair.py --analyses 20 --random 20000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_repair import extract_json  # noqa: E402
+from llm_provider import MockProvider  # noqa: E402
+
+RECOVERED, REJECTED, WRONG = range(3)
+
+
+def sample_analyses(count):
+    mock = MockProvider(latency=0)
+    analyses = []
+    for i in range(count):
+        analysis = json.loads(mock.response_for(f"patient {i}"))
+        analysis['diseases'][0]['description'] += ' Quoted "term", braces {x} and [y].'
+        analyses.append(analysis)
+    return analyses
+
+
+def naive_extract(text):
+    """The slicing approach extract_json replaced"""
+    start = text.find('{')
+    end = text.rfind('}') + 1
+    return json.loads(text[start:end].replace('\n', ' ').replace('\r', ''))
+
+
+def variants(analysis):
+    """Yield (label, damaged_text, expected) for damage that repairs exactly"""
+    text = json.dumps(analysis, indent=2)
+    yield 'clean', text, analysis
+    yield 'fenced', f"```json\n{text}\n```", analysis
+    yield 'prose', f"Here is the {{requested}} analysis:\n{text}\nLet me know {{if}} needed.", analysis
+    yield 'fenced+prose', f"Sure! {{ok}}\n```json\n{text}\n```\nDone.", analysis
+    yield ('trailing commas',
+           text.replace('\n  }', ',\n  }').replace('\n  ]', ',\n  ]'), analysis)
+    multiline = json.loads(text)
+    multiline['treatments'][0] = 'Rest\nand sleep'
+    yield ('raw newlines',
+           json.dumps(multiline, indent=2).replace('\\n', '\n'), multiline)
+    yield ('python literals',
+           text.replace('true', 'True').replace('false', 'False'), analysis)
+    yield 'unterminated fence', f"```json\n{text}", analysis
+
+
+def is_subset(partial, full):
+    if isinstance(partial, dict):
+        return isinstance(full, dict) and all(
+            k in full and is_subset(v, full[k]) for k, v in partial.items())
+    if isinstance(partial, list):
+        return isinstance(full, list) and len(partial) <= len(full) and all(
+            is_subset(p, f) for p, f in zip(partial, full))
+    return partial == full
+
+
+def fuzz(analyses, random_cases, seed):
+    rng = random.Random(seed)
+    counts = {}  # label -> [recovered, rejected, wrong]
+    failures = []
+
+    def record(label, outcome, detail=''):
+        """Count a case as 0 recovered, 1 rejected or 2 wrong"""
+        counts.setdefault(label, [0, 0, 0])[outcome] += 1
+        if outcome == WRONG and len(failures) < 10:
+            failures.append(f"{label}: {detail}")
+
+    naive_ok = repair_ok = total = 0
+    for analysis in analyses:
+        for label, text, expected in variants(analysis):
+            total += 1
+            try:
+                result, _ = extract_json(text)
+            except ValueError as e:
+                record(label, WRONG, f"{e}: {text[:80]!r}")
+            else:
+                ok = result == expected
+                record(label, RECOVERED if ok else WRONG, repr(text[:80]))
+                repair_ok += ok
+            try:
+                naive_ok += naive_extract(text) == expected
+            except ValueError:
+                pass
+
+        text = json.dumps(analysis, indent=2)
+        for cut in range(1, len(text)):
+            total += 1
+            try:
+                result, intact = extract_json(text[:cut])
+            except ValueError:
+                record('truncated', REJECTED)
+            else:
+                ok = bool(result) and not intact and is_subset(result, analysis)
+                record('truncated', RECOVERED if ok else WRONG,
+                       f"cut {cut}: {result!r} intact={intact}")
+                repair_ok += ok
+            try:
+                result = naive_extract(text[:cut])
+                naive_ok += bool(result) and is_subset(result, analysis)
+            except ValueError:
+                pass
+
+    alphabet = '{}[]",:\\ \n0aT'
+    for _ in range(random_cases):
+        text = json.dumps(rng.choice(analyses))
+        pos = rng.randrange(len(text))
+        op = rng.randrange(3)
+        if op == 0:
+            text = text[:pos] + text[pos + 1:]
+        elif op == 1:
+            text = text[:pos] + rng.choice(alphabet) + text[pos:]
+        else:
+            text = text[:pos] + rng.choice(alphabet) + text[pos + 1:]
+        try:
+            result, _ = extract_json(text)
+        except ValueError:
+            record('random corruption', REJECTED)
+        except Exception as e:
+            record('random corruption', WRONG, f"{type(e).__name__}: {text!r}")
+        else:
+            record('random corruption', RECOVERED if result else WRONG,
+                   f"empty result: {text!r}")
+
+    print(f"{'case':<20} {'recovered':>10} {'rejected':>9} {'wrong':>7}")
+    for label, (recovered, rejected, wrong) in counts.items():
+        print(f"{label:<20} {recovered:>10} {rejected:>9} {wrong:>7}")
+    print(f"\nrecovered (excluding random corruption): extract_json "
+          f"{repair_ok}/{total}, first/last brace slice {naive_ok}/{total}")
+    for failure in failures:
+        print("FAIL", failure)
+    return not failures
+
+
+def bench(analyses, repeat):
+    clean = [json.dumps(a, indent=2) for a in analyses]
+    damaged = [f"```json\n{t.replace(chr(10) + '  }', ',' + chr(10) + '  }')}\n```"
+               for t in clean]
+    truncated = [t[:len(t) * 2 // 3] for t in clean]
+    print(f"\n{'input':<12} {'json.loads':>12} {'extract_json':>14}")
+    for label, texts in (('clean', clean), ('damaged', damaged),
+                         ('truncated', truncated)):
+        baseline = '-'
+        if label == 'clean':
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for t in texts:
+                    json.loads(t)
+            baseline = f"{(time.perf_counter() - start) / (repeat * len(texts)) * 1e6:.1f} us"
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for t in texts:
+                extract_json(t)
+        per_call = (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+        print(f"{label:<12} {baseline:>12} {per_call:>11.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--analyses', type=int, default=20)
+    parser.add_argument('--random', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    analyses = sample_analyses(args.analyses)
+    ok = fuzz(analyses, args.random, args.seed)
+    bench(analyses, args.repeat)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Microbenchmark: lock-and-copy vs. immutable snapshot reads of sensor data.
+
+Simulates N concurrent `/sensor_data` readers against the serial thread
+writing frames, once with the old dict + lock + jsonify path and once with
+the SensorSnapshot reference swap, and reports reader throughput and writer
+update latency for each.
+
+    python benchmarks/bench_sensor_snapshot.py --readers 1 4 16 --seconds 2
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'munal-ai'))
+
+from sensor_snapshot import SensorSnapshot  # noqa: E402
+
+FRAME_INTERVAL = 0.02  # binary-mode frame rate, 50 Hz
+
+
+def frame(i):
+    return {'heart_rate': 60 + i % 40, 'temperature': 36.5, 'moisture': i % 100,
+            'raw_heartbeat': 500 + i % 200, 'sensor_errors': 0,
+            'comm_errors': 0}
+
+
+class LockedDict:
+    """The original design: one dict guarded by a lock"""
+
+    def __init__(self):
+        self.data = frame(0)
+        self.lock = threading.Lock()
+
+    def write(self, i):
+        with self.lock:
+            self.data.update(frame(i))
+
+    def read(self):
+        with self.lock:
+            return json.dumps(self.data)
+
+
+class SnapshotRef:
+    """The new design: rebind a reference to an immutable snapshot"""
+
+    def __init__(self):
+        self.current = SensorSnapshot.initial()
+
+    def write(self, i):
+        self.current = self.current.merge(frame(i), time.time())
+
+    def read(self):
+        return self.current.encoded
+
+
+def run(store, readers, seconds):
+    stop = threading.Event()
+    reads = [0] * readers
+    write_latencies = []
+
+    def reader(slot):
+        count = 0
+        while not stop.is_set():
+            store.read()
+            count += 1
+        reads[slot] = count
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            store.write(i)
+            write_latencies.append(time.perf_counter() - start)
+            i += 1
+            stop.wait(FRAME_INTERVAL)
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    write_latencies.sort()
+    if not write_latencies:
+        return sum(reads) / seconds, float('nan'), float('nan')
+    p99 = write_latencies[max(int(len(write_latencies) * 0.99) - 1, 0)]
+    return sum(reads) / seconds, p99 * 1e6, write_latencies[-1] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--seconds', type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'design':<10} {'readers':>7} {'reads/s':>12} "
+          f"{'write p99 us':>13} {'write max us':>13}")
+    for readers in args.readers:
+        for name, store in (('lock+copy', LockedDict()),
+                            ('snapshot', SnapshotRef())):
+            rate, p99, worst = run(store, readers, args.seconds)
+            print(f"{name:<10} {readers:>7} {rate:>12,.0f} "
+                  f"{p99:>13.1f} {worst:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
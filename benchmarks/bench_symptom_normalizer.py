@@ -0,0 +1,133 @@
+"""Microbenchmark: symptom normalisation throughput and cache-key collapse.
+
+Generates symptom lists the way people type them (mixed case, stray
+spaces, words run apart, lay aliases, one-letter typos, shuffled order)
+plus free-text paragraphs, then times `SymptomNormalizer.normalize` on
+them. Cold runs start every round with an empty spelling-correction cache.
+Also checks how many requests come back as exactly the symptoms they
+were generated from, and counts the distinct cache keys the same requests
+produce before normalisation (`canonical_symptoms` alone) and after it.
+
+    python benchmarks/bench_symptom_normalizer.py --requests 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_cache import canonical_symptoms  # noqa: E402
+from symptom_normalizer import SOURCE, SymptomNormalizer  # noqa: E402
+
+OPENERS = ["I have", "I've had", "Since yesterday I have", "My son has",
+           "For two days I've had", "I keep getting"]
+NEGATED = ["but no {}", "no {} though", "and I don't have {}", "without {}"]
+
+
+def typo(word, rng):
+    """Swap two adjacent letters or replace one, as a hurried typist would"""
+    if len(word) < 6:
+        i = rng.randrange(len(word) - 1)
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    i = rng.randrange(1, len(word))
+    return word[:i] + rng.choice('aeiou') + word[i + 1:]
+
+
+def variant(term, aliases, rng):
+    """Spell a symptom one of the ways a user might"""
+    choice = rng.random()
+    if choice < 0.25 and aliases.get(term):
+        term = rng.choice(aliases[term])
+    elif choice < 0.45:
+        words = term.split()
+        k = rng.randrange(len(words))
+        if len(words[k]) >= 4:
+            words[k] = typo(words[k], rng)
+        term = ' '.join(words)
+    elif choice < 0.55 and term == 'headache':
+        term = 'head ache'
+    if rng.random() < 0.3:
+        term = term.upper() if rng.random() < 0.3 else term.capitalize()
+    if rng.random() < 0.2:
+        term = f" {term}  "
+    return term
+
+
+def make_requests(count, seed):
+    with open(SOURCE, encoding='utf-8') as f:
+        data = json.load(f)
+    aliases = {}
+    for alias, canonical in data['aliases'].items():
+        aliases.setdefault(canonical, []).append(alias)
+    rng = random.Random(seed)
+    lists, paragraphs, expected = [], [], []
+    for _ in range(count):
+        condition = rng.choice(data['conditions'])
+        symptoms = sorted(condition['symptoms'], key=lambda _: rng.random())[:rng.randint(2, 5)]
+        lists.append([variant(s, aliases, rng) for s in symptoms])
+        absent = rng.choice([s for s in aliases if s not in symptoms])
+        expected.append((tuple(sorted(symptoms)), (absent,)))
+        paragraphs.append(
+            f"{rng.choice(OPENERS)} {', '.join(variant(s, aliases, rng) for s in symptoms[:-1])}"
+            f" and {variant(symptoms[-1], aliases, rng)}, {rng.choice(NEGATED).format(absent)}.")
+    return lists, paragraphs, expected
+
+
+def throughput(inputs, rounds, cold):
+    normalizer = SymptomNormalizer.from_file()
+    elapsed = 0.0
+    for _ in range(rounds):
+        if cold:
+            normalizer = SymptomNormalizer.from_file()
+        start = time.perf_counter()
+        for entries in inputs:
+            normalizer.normalize(entries)
+        elapsed += time.perf_counter() - start
+    return len(inputs) * rounds / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    lists, paragraphs, expected = make_requests(args.requests, args.seed)
+    paragraph_inputs = [[p] for p in paragraphs]
+
+    start = time.perf_counter()
+    SymptomNormalizer.from_file()
+    print(f"vocabulary load and automaton build: {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    print(f"{'input':<12} {'cold req/s':>12} {'warm req/s':>12}")
+    for label, inputs in (('lists', lists), ('paragraphs', paragraph_inputs)):
+        cold = throughput(inputs, args.rounds, cold=True)
+        warm = throughput(inputs, args.rounds, cold=False)
+        print(f"{label:<12} {cold:>12,.0f} {warm:>12,.0f}")
+
+    normalizer = SymptomNormalizer.from_file()
+    list_exact = sum(normalizer.normalize(entries).present == present
+                     for entries, (present, _) in zip(lists, expected))
+    paragraph_exact = sum(
+        (result.present, result.negated) == truth
+        for result, truth in zip((normalizer.normalize(p) for p in paragraph_inputs), expected))
+    print(f"\nrecovered exactly: lists {list_exact / len(lists):.1%}, "
+          f"paragraphs (with the negated symptom) {paragraph_exact / len(paragraphs):.1%}")
+
+    raw_keys = {tuple(canonical_symptoms(entries)) for entries in lists}
+    normalized_keys = {tuple(normalizer.normalize(entries).terms()) for entries in lists}
+    paragraph_raw = {tuple(canonical_symptoms(p)) for p in paragraph_inputs}
+    paragraph_keys = {tuple(normalizer.normalize(p).terms())
+                      for p in paragraph_inputs}
+    print(f"\ndistinct cache keys for {args.requests} requests:")
+    print(f"{'input':<12} {'before':>8} {'after':>8}")
+    print(f"{'lists':<12} {len(raw_keys):>8} {len(normalized_keys):>8}")
+    print(f"{'paragraphs':<12} {len(paragraph_raw):>8} {len(paragraph_keys):>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+"""Build the purged stylesheet both apps serve instead of the CDN links.
+
+The pages only use a few hundred of Tailwind's utility classes and two
+animate.css animations, yet load both libraries whole from public CDNs.
+This script reads the HTML_TEMPLATE of maya.py and munal-ai/munal.py,
+collects every class-like token in them (markup and the JavaScript that
+toggles classes), and keeps from the library CSS only:
+
+- rules without class selectors (the preflight reset, `:root` variables)
+- selectors whose classes all appear in a template
+- @keyframes referenced by a kept rule, and @media blocks left non-empty
+- `/*! ... */` license banners
+
+It writes the result minified to static/app.css, ending in a comment with a
+hash of the template classes it was built for. Run it on a machine with
+internet access, or point it at local copies of the library files, after
+changing any template:
+
+    python build_css.py
+    python build_css.py --source tailwind.min.css --source animate.min.css
+
+serve.py calls `ensure()` before serving, which rebuilds the file when it is
+missing or the templates' classes have changed since, and otherwise leaves
+it alone. So a deployment that runs serve.py once with internet access has
+a current stylesheet from then on; CI builds it the same way.
+"""
+import argparse
+import ast
+import gzip
+import hashlib
+import os
+import re
+import urllib.request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES = [os.path.join(ROOT, 'maya.py'),
+             os.path.join(ROOT, 'munal-ai', 'munal.py')]
+SOURCES = [
+    'https://cdn.jsdelivr.net/npm/tailwindcss@2.2.19/dist/tailwind.min.css',
+    'https://cdnjs.cloudflare.com/ajax/libs/animate.css/4.1.1/animate.min.css',
+]
+OUTPUT = os.path.join(ROOT, 'static', 'app.css')
+
+# Same idea as Tailwind's default purge extractor: anything between quotes,
+# angle brackets and whitespace could be a class name
+TOKEN = re.compile(r'[^<>"\'`\s]*[^<>"\'`\s:]')
+CLASS = re.compile(r'\.((?:\\[0-9a-fA-F]{1,6}\s?|\\.|[\w-])+)')
+ESCAPE = re.compile(r'\\([0-9a-fA-F]{1,6}\s?|.)')
+COMMENT = re.compile(r'/\*(.*?)\*/', re.S)
+KEYFRAMES = re.compile(r'@(?:-\w+-)?keyframes\s+([\w-]+)')
+ANIMATION = re.compile(r'animation(?:-name)?\s*:([^;}]*)')
+STAMP = re.compile(r'/\*# templates=(\w+) \*/\s*$')
+
+
+def template_tokens(paths=TEMPLATES):
+    """Return every class-like token in the apps' HTML templates"""
+    tokens = set()
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and any(
+                    getattr(t, 'id', None) == 'HTML_TEMPLATE' for t in node.targets):
+                tokens.update(TOKEN.findall(ast.literal_eval(node.value)))
+    return tokens
+
+
+def template_hash(tokens):
+    """Return a short hash identifying a set of template tokens"""
+    return hashlib.sha256('\n'.join(sorted(tokens)).encode('utf-8')).hexdigest()[:16]
+
+
+def is_current(path=OUTPUT, tokens=None):
+    """Return True if path was built for the templates as they are now"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            stamp = STAMP.search(f.read())
+    except OSError:
+        return False
+    tokens = template_tokens() if tokens is None else tokens
+    return stamp is not None and stamp.group(1) == template_hash(tokens)
+
+
+def read_source(source, timeout=30):
+    """Read a stylesheet from a URL or a local path"""
+    if re.match(r'https?://', source):
+        with urllib.request.urlopen(source, timeout=timeout) as response:
+            return response.read().decode('utf-8')
+    with open(source, encoding='utf-8') as f:
+        return f.read()
+
+
+def _unescape(match):
+    code = match.group(1)
+    if len(code) > 1 or code in '0123456789abcdefABCDEF':
+        return chr(int(code.strip(), 16))
+    return code
+
+
+def selector_classes(selector):
+    """Return the unescaped class names in a selector"""
+    return [ESCAPE.sub(_unescape, name) for name in CLASS.findall(selector)]
+
+
+def split_top_level(text, separator):
+    """Split on separator outside parentheses and brackets"""
+    parts, depth, start = [], 0, 0
+    for i, c in enumerate(text):
+        if c in '([':
+            depth += 1
+        elif c in ')]':
+            depth -= 1
+        elif c == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def parse_blocks(css):
+    """Yield (prelude, body) for each top-level rule; body None for statements"""
+    i, n = 0, len(css)
+    while i < n:
+        brace = css.find('{', i)
+        semi = css.find(';', i)
+        if brace == -1 and semi == -1:
+            return
+        if semi != -1 and (brace == -1 or semi < brace):
+            yield css[i:semi].strip(), None
+            i = semi + 1
+            continue
+        depth, j = 1, brace + 1
+        while j < n and depth:
+            if css[j] == '{':
+                depth += 1
+            elif css[j] == '}':
+                depth -= 1
+            j += 1
+        yield css[i:brace].strip(), css[brace + 1:j - 1]
+        i = j
+
+
+def minify(text):
+    text = re.sub(r'\s+', ' ', text).strip()
+    return re.sub(r'\s*([{};,>])\s*', r'\1', text).replace(';}', '}')
+
+
+def purge(css, used, keyframes):
+    """Return css reduced to rules that can match the used classes.
+
+    Keyframe blocks are collected into `keyframes` (name -> text) instead of
+    being emitted, so only the referenced ones are added back at the end.
+    """
+    out = []
+    for prelude, body in parse_blocks(css):
+        if not prelude:
+            continue
+        if body is None:
+            if prelude.startswith('@charset'):
+                continue  # one per output file, written by build()
+            out.append(minify(prelude) + ';')
+        elif prelude.startswith('@'):
+            name = KEYFRAMES.match(prelude)
+            if name:
+                keyframes.setdefault(name.group(1), []).append(
+                    minify(prelude) + '{' + minify(body) + '}')
+            elif prelude.startswith(('@media', '@supports')):
+                inner = purge(body, used, keyframes)
+                if inner:
+                    out.append(minify(prelude) + '{' + inner + '}')
+            else:
+                out.append(minify(prelude) + '{' + minify(body) + '}')
+        else:
+            selectors = [s for s in split_top_level(prelude, ',')
+                         if all(c in used for c in selector_classes(s))]
+            if selectors:
+                out.append(','.join(minify(s) for s in selectors)
+                           + '{' + minify(body) + '}')
+    return ''.join(out)
+
+
+def referenced_keyframes(css, keyframes):
+    """Return the keyframe blocks named in animation declarations"""
+    names = set()
+    for value in ANIMATION.findall(css):
+        names.update(re.findall(r'[\w-]+', value))
+    return ''.join(''.join(keyframes[name]) for name in keyframes if name in names)
+
+
+def build(sources, used, timeout=30):
+    """Return (purged_css, original_css) for the given sources"""
+    originals, parts, keyframes = [], [], {}
+    for source in sources:
+        css = read_source(source, timeout)
+        originals.append(css)
+        banners = ['/*' + c + '*/' for c in COMMENT.findall(css) if c.startswith('!')]
+        parts.append(''.join(banners) + purge(COMMENT.sub('', css), used, keyframes))
+    purged = ''.join(parts)
+    return ('@charset "UTF-8";' + purged + referenced_keyframes(purged, keyframes),
+            ''.join(originals))
+
+
+def write(path, purged, used):
+    """Write the purged stylesheet stamped with the templates it serves"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"{purged}\n/*# templates={template_hash(used)} */\n")
+
+
+def ensure(path=OUTPUT, sources=SOURCES, timeout=10):
+    """Build the stylesheet unless a current one exists; False if it cannot"""
+    used = template_tokens()
+    if is_current(path, used):
+        return True
+    try:
+        purged, _ = build(sources, used, timeout)
+    except (OSError, ValueError) as e:
+        state = 'stale' if os.path.exists(path) else 'missing'
+        print(f"Could not build {path} ({e}); the stylesheet stays {state}")
+        return False
+    write(path, purged, used)
+    print(f"Built {path} for the current templates")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--source', action='append',
+                        help='stylesheet URL or path (default: the CDN files)')
+    parser.add_argument('--output', default=OUTPUT)
+    args = parser.parse_args()
+
+    used = template_tokens()
+    purged, original = build(args.source or SOURCES, used)
+    write(args.output, purged, used)
+
+    for label, css in (('library', original), ('purged', purged)):
+        data = css.encode('utf-8')
+        print(f"{label:<8} {len(data) / 1024:>9.1f} KB  "
+              f"gzip {len(gzip.compress(data, 9)) / 1024:>7.1f} KB")
+    print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
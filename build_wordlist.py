@@ -0,0 +1,79 @@
+"""Build the English word list the symptom normaliser never corrects.
+
+Spelling correction maps a word one or two edits from a symptom word onto
+it, which is right for "fevr" but wrong for real words that happen to sit
+that close: "infrequent" is not "frequent", "rumination" is not
+"urination". symptom_normalizer.py only corrects words missing from
+english_words.txt, which this script writes from two packages:
+
+- `wordfreq`: the CORE most frequent English words are all kept
+- beyond those, up to the TOTAL most frequent, a word is kept only if it or
+  its stem (less -s, -es, -ed, -ing, -er, -est, -ly, -y) is in a dictionary
+  from `english-words`. Web text this rare is thick with names and other
+  languages ("pani", "aceh"), which are more often typos of symptoms.
+
+Only lowercase ASCII words of at least MIN_SWAP_LENGTH letters are written;
+shorter words are never corrected anyway. Run it on a machine with
+`pip install wordfreq english-words`; the output is committed, so the apps
+need neither package:
+
+    python build_wordlist.py
+    python build_wordlist.py --core 30000 --total 100000
+"""
+import argparse
+import os
+
+from symptom_normalizer import MIN_SWAP_LENGTH, WORDS_PATH
+
+CORE = 30000
+TOTAL = 100000
+SUFFIXES = ('s', 'es', 'ed', 'd', 'ing', 'er', 'est', 'ly', 'y')
+MIN_STEM_LENGTH = 3
+
+
+def stems(word):
+    """Yield the dictionary forms a regularly inflected word may come from"""
+    for suffix in SUFFIXES:
+        stem = word[:-len(suffix)]
+        if word.endswith(suffix) and len(stem) >= MIN_STEM_LENGTH:
+            yield stem
+            yield stem + 'e'  # bruised, aching
+            if stem[-1] == stem[-2]:
+                yield stem[:-1]  # throbbing
+            if stem[-1] == 'i':
+                yield stem[:-1] + 'y'  # worried
+
+
+def build(core, total):
+    """Return the sorted word list"""
+    from english_words import get_english_words_set
+    from wordfreq import top_n_list
+    dictionary = {w for w in get_english_words_set(['web2', 'gcide'], alpha=True)
+                  if w.islower()}
+    frequent = top_n_list('en', total)
+    common = set(frequent[:core])
+    return sorted({w for w in frequent
+                   if len(w) >= MIN_SWAP_LENGTH and w.isascii() and w.isalpha()
+                   and (w in common or w in dictionary
+                        or any(s in dictionary for s in stems(w)))})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--core', type=int, default=CORE,
+                        help='most frequent words kept without a dictionary check')
+    parser.add_argument('--total', type=int, default=TOTAL,
+                        help='most frequent words considered at all')
+    parser.add_argument('--output', default=WORDS_PATH)
+    args = parser.parse_args()
+
+    words = build(args.core, args.total)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(f"# Generated by build_wordlist.py (--core {args.core} "
+                f"--total {args.total}); do not edit\n")
+        f.write('\n'.join(words) + '\n')
+    print(f"Wrote {len(words)} words to {os.path.relpath(args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""Keep a prompt's static prefix cached with the model provider.
+
+Every analysis prompt starts with the same instruction block, which is
+most of its tokens. With context caching the provider stores that
+prefix once. Each request then sends only the patient part, which refers
+to the stored copy, so it carries fewer input tokens and starts sooner.
+
+`ContextCache` owns one cached prefix. `prepare(prompt)` returns the text
+to send and the context to send it with, or the whole prompt and None
+while no usable context exists; `generate(prompt)` and `stream(prompt)`
+send it through the provider. Requests never wait for the cache:
+creating, refreshing and retrying it happen on a background thread that
+the first request to find it missing or due starts. A context is
+refreshed (its TTL extended) once it is within LLM_CONTEXT_REFRESH of
+expiring; a failed refresh drops it. Between the refresh and the expiry,
+EXPIRY_GUARD seconds are kept back so an in-flight call never lands after
+it. An idle app lets
+its context lapse and recreates it when traffic returns. A failed
+create is retried after LLM_CONTEXT_RETRY seconds.
+
+A context can also vanish upstream before its local expiry, for example
+when it is deleted. The provider then raises `ContextNotFound`; the cache
+drops the context, sends that request once more as the whole prompt and
+recreates the context in the background. `ContextNotFound` is not a
+transient error, so the resilience layer neither retries it nor counts it
+towards opening the circuit.
+
+Providers implement `create_context(prefix, ttl)` and
+`refresh_context(context, ttl)` and accept `context=` on `generate` and
+`stream`; the mock provider simulates this locally. Gemini only caches
+prompts above a model-specific minimum size (from about a thousand
+tokens up to 32k, more than these prefixes) and only on versioned models
+that support it.
+Below that the create fails, is logged, and prompts go out whole.
+Prompts that already put a shared prefix first can still benefit from
+the provider's implicit caching.
+
+Configuration comes from the environment:
+
+    LLM_CONTEXT_CACHE=0       1 to cache prompt prefixes with the provider
+    LLM_CONTEXT_TTL=3600      seconds a cached prefix lives upstream
+    LLM_CONTEXT_REFRESH=300   seconds before expiry to extend it
+    LLM_CONTEXT_RETRY=600     seconds to wait after a failed create or refresh
+"""
+import os
+import threading
+import time
+
+from llm_provider import ContextNotFound
+
+ENABLED = os.environ.get('LLM_CONTEXT_CACHE', '0') == '1'
+CONTEXT_TTL = float(os.environ.get('LLM_CONTEXT_TTL', 3600))
+REFRESH_MARGIN = float(os.environ.get('LLM_CONTEXT_REFRESH', 300))
+RETRY_AFTER = float(os.environ.get('LLM_CONTEXT_RETRY', 600))
+EXPIRY_GUARD = 60  # seconds; at least the model call deadline
+
+
+class ContextCache:
+    """One static prompt prefix cached upstream and kept alive"""
+
+    def __init__(self, provider, prefix, ttl=CONTEXT_TTL,
+                 refresh_margin=REFRESH_MARGIN, retry_after=RETRY_AFTER,
+                 enabled=ENABLED):
+        self.provider = provider
+        self.prefix = prefix
+        self.ttl = ttl
+        self.refresh_margin = min(refresh_margin, ttl / 2)
+        self.retry_after = retry_after
+        self.enabled = bool(enabled and provider is not None
+                            and hasattr(provider, 'create_context'))
+        self._context = None
+        self._busy = False
+        self._next_attempt = 0.0
+        self._lock = threading.Lock()
+        self.created = 0
+        self.refreshed = 0
+        self.failures = 0
+        self.used = 0
+        self.bypassed = 0
+        self.lost = 0
+        self.resent = 0
+
+    def context(self):
+        """Return a live cached context, or None; starts upkeep when due"""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            context = self._context
+            if context is not None and now >= context.expires_at - EXPIRY_GUARD:
+                context = None
+            due = (not self._busy and now >= self._next_attempt and (
+                context is None
+                or now >= context.expires_at - self.refresh_margin))
+            if due:
+                self._busy = True
+        if due:
+            threading.Thread(target=self._upkeep, args=(context,),
+                             daemon=True).start()
+        return context
+
+    def prepare(self, prompt):
+        """Return (text to send, context) for a rendered prompt"""
+        context = self.context()
+        if context is None or not prompt.text.startswith(self.prefix):
+            with self._lock:
+                self.bypassed += 1
+            return prompt.text, None
+        with self._lock:
+            self.used += 1
+        return prompt.text[len(self.prefix):], context
+
+    def generate(self, prompt, on_send=None):
+        """Return the response text for a rendered prompt.
+
+        on_send(prompt, cached) is called before each call upstream.
+        """
+        sent, context = self.prepare(prompt)
+        if on_send:
+            on_send(prompt, cached=context is not None)
+        try:
+            return self.provider.generate(sent, context=context)
+        except ContextNotFound:
+            if context is None:
+                raise
+            self._lose(context)
+        if on_send:
+            on_send(prompt, cached=False)
+        return self.provider.generate(prompt.text)
+
+    def stream(self, prompt, on_send=None):
+        """Yield response chunks for a rendered prompt; see generate"""
+        sent, context = self.prepare(prompt)
+        if on_send:
+            on_send(prompt, cached=context is not None)
+        started = False
+        try:
+            for chunk in self.provider.stream(sent, context=context):
+                started = True
+                yield chunk
+            return
+        except ContextNotFound:
+            if context is None or started:
+                raise
+            self._lose(context)
+        if on_send:
+            on_send(prompt, cached=False)
+        yield from self.provider.stream(prompt.text)
+
+    def stats(self):
+        """Return the cached context's state and usage counters"""
+        with self._lock:
+            context = self._context
+            stats = {
+                'enabled': self.enabled,
+                'name': context.name if context else None,
+                'cached_tokens': context.tokens if context else 0,
+                'expires_in': round(max(0.0, context.expires_at - time.monotonic()))
+                if context else 0,
+                'created': self.created,
+                'refreshed': self.refreshed,
+                'failures': self.failures,
+                'used': self.used,
+                'bypassed': self.bypassed,
+                'lost': self.lost,
+                'resent': self.resent,
+            }
+        return stats
+
+    def _upkeep(self, context):
+        """Create the context, or extend the live one, off the request path"""
+        try:
+            if context is None:
+                fresh = self.provider.create_context(self.prefix, self.ttl)
+            else:
+                fresh = self.provider.refresh_context(context, self.ttl)
+        except Exception as e:
+            print(f"Could not {'create' if context is None else 'refresh'} "
+                  f"cached prompt context: {e}")
+            with self._lock:
+                self.failures += 1
+                self._next_attempt = time.monotonic() + self.retry_after
+                self._busy = False
+                if context is not None and self._is_current(context):
+                    # The upstream copy may be gone; stop sending requests to it
+                    self._context = None
+            return
+        with self._lock:
+            if context is not None and not self._is_current(context):
+                # Dropped as lost while the refresh was in flight
+                self._busy = False
+                return
+            self._context = fresh
+            if context is None:
+                self.created += 1
+            else:
+                self.refreshed += 1
+            self._busy = False
+
+    def _is_current(self, context):
+        return self._context is not None and self._context.name == context.name
+
+    def _lose(self, context):
+        """Drop a context the provider no longer has; the next call recreates it"""
+        with self._lock:
+            current = self._is_current(context)
+            if current:
+                self._context = None
+                self._next_attempt = 0.0
+                self.lost += 1
+            self.resent += 1
+        if current:
+            print(f"Cached prompt context {context.name} is gone upstream; "
+                  f"sending whole prompts until it is recreated")
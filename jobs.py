@@ -0,0 +1,112 @@
+"""Background job queue for long-running symptom analyses.
+
+`POST /analyze` submits work here and returns a job id straight away; the
+Gemini call runs on this queue's own threads. The browser then long-polls
+`GET /analyze/<job_id>` until the job settles. Each poll does hold a Flask
+worker while it waits, but only up to the app's MAX_POLL_WAIT
+(`ANALYSIS_POLL_WAIT` seconds, default 25; 0 makes every poll return at
+once), not for the whole call.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Job:
+    """State of a single submitted analysis"""
+
+    __slots__ = ('job_id', 'status', 'result', 'error', 'created_at',
+                 'started_at', 'finished_at', 'finished')
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.finished = threading.Event()
+
+    def to_dict(self):
+        """Return the JSON-serialisable view of this job"""
+        data = {'job_id': self.job_id, 'status': self.status}
+        if self.status == DONE:
+            data['result'] = self.result
+        elif self.status == FAILED:
+            data['error'] = self.error
+        return data
+
+
+class JobQueue:
+    """Run analyses on a worker pool and keep their results for polling"""
+
+    def __init__(self, workers=4, result_ttl=600, max_jobs=1000):
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='analysis')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) and return the new job"""
+        job = Job(uuid.uuid4().hex)
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        """Return the job with this id, or None if unknown or expired"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout):
+        """Block up to timeout seconds for a job to finish, then return it"""
+        job = self.get(job_id)
+        if job is not None and timeout > 0:
+            job.finished.wait(timeout)
+        return job
+
+    def stats(self):
+        """Return the number of tracked jobs in each state"""
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return counts
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            print(f"Error in analysis job {job.job_id}: {e}")
+            job.error = str(e) or 'Analysis failed'
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            job.finished.set()
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            expired = job.finished_at is not None and job.finished_at < cutoff
+            if expired or len(self._jobs) >= self.max_jobs:
+                if job.finished_at is None:
+                    break
+                del self._jobs[job_id]
+            else:
+                break
@@ -0,0 +1,209 @@
+"""Tolerant extraction of JSON from free-form model output.
+
+Model answers are meant to be bare JSON but often arrive wrapped in markdown
+fences or prose, with trailing commas, raw newlines inside strings, Python
+literals, or cut off mid-object when the output limit is hit. Slicing from
+the first `{` to the last `}` breaks on all of these. `extract_json` instead:
+
+1. tries the text as-is, then the contents of any ```json fences
+2. walks each candidate opening bracket with a small scanner that knows
+   about strings and escapes, so braces inside strings or stray braces in
+   the surrounding prose do not confuse it
+3. repairs what the scanner sees on the way: trailing commas are dropped,
+   control characters in strings escaped, True/False/None lowercased, and
+   mismatched closers corrected
+4. if the text ends inside the value, cuts back to the last complete member
+   and closes every open array and object
+
+so that a usable object comes out of nearly anything the model sends. It
+also says whether that object is the model's answer exactly as written.
+A truncated or repaired answer may have lost members, so callers should
+show it but not cache it. An empty object or array is not an answer and
+raises ValueError, like text with no JSON at all.
+"""
+import json
+import re
+
+FENCE = re.compile(r'```[ \t]*(?:json|JSON)?[ \t]*\r?\n?(.*?)(?:```|$)', re.S)
+# Give up after this many candidate start positions per text
+MAX_STARTS = 16
+CLOSERS = {'{': '}', '[': ']'}
+LITERALS = {'True': 'true', 'False': 'false', 'None': 'null',
+            'true': 'true', 'false': 'false', 'null': 'null'}
+STRING_ESCAPES = {'\n': '\\n', '\r': '\\r', '\t': '\\t'}
+DECODER = json.JSONDecoder()
+
+
+def repair_json(text, start=0):
+    """Return (json_text, complete) for the value opening at text[start].
+
+    `complete` is False when the input ended before the value closed and
+    the returned text had to be truncated and closed.
+    """
+    out = []
+    stack = []  # closers of the open containers
+    expect = []  # per container: 'key' or 'value'
+    safe = None  # (len(out), stack) right after the last complete value
+    in_string = escape = string_is_key = False
+    scalar_start = None
+
+    def value_done():
+        nonlocal safe
+        safe = (len(out), stack[:])
+
+    def end_scalar():
+        nonlocal scalar_start
+        if scalar_start is None:
+            return
+        token = ''.join(out[scalar_start:])
+        if token in LITERALS:
+            del out[scalar_start:]
+            out.append(LITERALS[token])
+        scalar_start = None
+        value_done()
+
+    def drop_trailing_comma():
+        while out and out[-1].isspace():
+            out.pop()
+        if out and out[-1] == ',':
+            out.pop()
+
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_string:
+            if escape:
+                escape = False
+                out.append(c)
+            elif c == '\\':
+                escape = True
+                out.append(c)
+            elif c == '"':
+                in_string = False
+                out.append(c)
+                if string_is_key:
+                    expect[-1] = 'colon'
+                else:
+                    value_done()
+            else:
+                out.append(STRING_ESCAPES.get(c, c) if c < ' ' else c)
+            continue
+
+        if c == '"':
+            end_scalar()
+            in_string = True
+            string_is_key = bool(stack) and expect[-1] == 'key'
+            out.append(c)
+        elif c in '{[':
+            end_scalar()
+            stack.append(CLOSERS[c])
+            expect.append('key' if c == '{' else 'value')
+            out.append(c)
+        elif c in '}]':
+            if not stack:
+                break
+            end_scalar()
+            drop_trailing_comma()
+            out.append(stack.pop())
+            expect.pop()
+            if not stack:
+                return ''.join(out), True
+            value_done()
+        elif c == ',':
+            if not stack:
+                break
+            end_scalar()
+            out.append(c)
+            expect[-1] = 'key' if stack[-1] == '}' else 'value'
+        elif c == ':':
+            end_scalar()
+            out.append(c)
+            if expect:
+                expect[-1] = 'value'
+        elif c.isspace():
+            end_scalar()
+            out.append(c)
+        else:
+            if scalar_start is None:
+                scalar_start = len(out)
+            out.append(c)
+
+    if not stack:
+        # Never opened a container (or a scalar-only document)
+        end_scalar()
+        return ''.join(out), True
+
+    # Truncated: keep only what was complete, then close the rest. A number
+    # at the very end may have lost digits, so only literals count as whole
+    if not in_string and scalar_start is not None \
+            and ''.join(out[scalar_start:]) in LITERALS:
+        end_scalar()
+    if safe is None:
+        out[1:] = []
+        stack[1:] = []
+    else:
+        cut, stack = safe
+        del out[cut:]
+    drop_trailing_comma()
+    out.extend(reversed(stack))
+    return ''.join(out), False
+
+
+def _candidates(text):
+    stripped = text.strip()
+    yield stripped
+    for match in FENCE.finditer(text):
+        body = match.group(1).strip()
+        if body and body != stripped:
+            yield body
+
+
+def extract_json(text, container='{'):
+    """Return (value, intact) for the first non-empty object in text.
+
+    With container='[' the first non-empty array is returned instead.
+    `intact` is False when the value was truncated or had to be repaired.
+    Raises ValueError if nothing usable can be recovered.
+    """
+    if not text:
+        raise ValueError('Empty model response')
+    for candidate in _candidates(text):
+        if candidate.startswith(container):
+            try:
+                value = json.loads(candidate)
+                if value:
+                    return value, True
+            except ValueError:
+                pass
+        start = candidate.find(container)
+        tries = 0
+        while start != -1 and tries < MAX_STARTS:
+            tries += 1
+            try:
+                # Valid JSON inside prose needs no repair
+                value, _ = DECODER.raw_decode(candidate, start)
+                if value:
+                    return value, True
+            except ValueError:
+                pass
+            repaired, _ = repair_json(candidate, start)
+            try:
+                value = json.loads(repaired)
+            except ValueError:
+                value = None
+            if value:
+                return value, False
+            start = candidate.find(container, start + 1)
+    raise ValueError('No JSON value could be recovered from model output')
+
+
+def loads_lenient(raw):
+    """Parse a single JSON value, repairing it if needed; raises ValueError"""
+    try:
+        return json.loads(raw)
+    except ValueError:
+        pass
+    repaired, _ = repair_json('[' + raw + ']')
+    values = json.loads(repaired)
+    if not values:
+        raise ValueError('No JSON value in fragment')
+    return values[0]
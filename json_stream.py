@@ -0,0 +1,179 @@
+"""Incremental parser for streamed analysis JSON.
+
+The model streams its answer as text chunks. `AnalysisStreamParser` scans
+them as they arrive and reports every top-level field as soon as it is
+complete; list fields such as `diseases` or `treatments` are reported one
+element at a time so the page can render them before the answer finishes.
+Values are parsed leniently (see `json_repair`), so a trailing comma or a raw
+newline inside one item does not lose it. Any value that needed repair, any
+item or value that could not be parsed and was dropped, and a finished object
+that is not strict JSON set `repaired`; only an answer that is `complete` and
+was never repaired is `intact`.
+"""
+import json
+
+from json_repair import loads_lenient
+
+
+class AnalysisStreamParser:
+    """Turn streamed text chunks into (field, value) events"""
+
+    def __init__(self):
+        self._buf = []
+        self._text = ''
+        self._pos = 0
+        self._started = False
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+        self._in_array = False
+        self._item_start = None
+        self.fields = {}
+        self.complete = False
+        self.repaired = False
+
+    def feed(self, chunk):
+        """Consume a chunk of model output and return any completed events"""
+        if not chunk or self.complete:
+            return []
+        self._text += chunk
+        events = []
+        text = self._text
+        i = self._pos
+        while i < len(text) and not self.complete:
+            ch = text[i]
+            if not self._started:
+                if ch == '{':
+                    self._started = True
+                    self._start = i
+                    self._depth = 1
+                    self._expect_key = True
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = json.loads(text[self._key_start:i + 1])
+                        self._key_start = None
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key_start = i
+                    self._expect_key = False
+            elif ch == ':' and self._depth == 1:
+                self._value_start = i + 1
+            elif ch in '{[':
+                if (ch == '[' and self._depth == 1
+                        and not text[self._value_start:i].strip()):
+                    self._in_array = True
+                    self._item_start = i + 1
+                    self.fields[self._key] = []
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 1 and self._in_array and ch == ']':
+                    self._emit_item(text[self._item_start:i], events, last=True)
+                    self._in_array = False
+                    self._value_start = None
+                elif self._depth == 0:
+                    self._emit_value(text[self._value_start:i], events)
+                    self.complete = True
+                    self._check(text[self._start:i + 1])
+            elif ch == ',':
+                if self._depth == 2 and self._in_array:
+                    self._emit_item(text[self._item_start:i], events)
+                    self._item_start = i + 1
+                elif self._depth == 1:
+                    self._emit_value(text[self._value_start:i], events)
+                    self._expect_key = True
+            i += 1
+        self._pos = i
+        return events
+
+    def result(self):
+        """Return the object assembled from every field seen so far"""
+        return dict(self.fields)
+
+    @property
+    def text(self):
+        """All raw text received so far"""
+        return self._text
+
+    @property
+    def intact(self):
+        """Whether the whole answer arrived and parsed without any repair"""
+        return self.complete and not self.repaired
+
+    def _check(self, raw):
+        """Strictly parse the finished object; anything lenient is a repair"""
+        try:
+            json.loads(raw)
+        except ValueError:
+            self.repaired = True
+
+    def _load(self, raw):
+        """Parse one value, noting any repair; raises ValueError if unusable"""
+        try:
+            return json.loads(raw)
+        except ValueError:
+            self.repaired = True
+        return loads_lenient(raw)
+
+    def _emit_item(self, raw, events, last=False):
+        raw = raw.strip()
+        if not raw:
+            # Only the body of an empty list may be blank
+            if not last or self.fields[self._key]:
+                self.repaired = True
+            return
+        try:
+            item = self._load(raw)
+        except ValueError:
+            return
+        self.fields[self._key].append(item)
+        events.append((self._key, item))
+
+    def _emit_value(self, raw, events):
+        if self._value_start is None or self._key is None:
+            return
+        self._value_start = None
+        raw = raw.strip()
+        if not raw:
+            self.repaired = True
+            return
+        try:
+            value = self._load(raw)
+        except ValueError:
+            return
+        self.fields[self._key] = value
+        events.append((self._key, value))
+
+
+def iter_analysis_events(analysis):
+    """Yield the events a parser would emit for an already complete analysis"""
+    for key, value in analysis.items():
+        if isinstance(value, list):
+            for item in value:
+                yield key, item
+        else:
+            yield key, value
+
+
+def format_sse(event, data):
+    """Encode one Server-Sent Event frame"""
+    payload = json.dumps(data, separators=(',', ':'))
+    return f"event: {event}\ndata: {payload}\n\n"
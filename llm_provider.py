@@ -0,0 +1,293 @@
+"""Language-model providers behind one small interface.
+
+Both apps talk to the model only through `generate(prompt, timeout)`, which
+returns the response text, and `stream(prompt, timeout)`, which yields text
+chunks. Both take an optional `context`, a prompt prefix cached upstream by
+`create_context(prefix, ttl)` and kept alive by `refresh_context`; the
+prompt is then only what follows the prefix (see context_cache.py). The Gemini
+provider wraps `google.generativeai`; the mock provider answers locally with
+a deterministic, well-formed analysis after a configurable delay and can
+inject failures, so the whole request path can be load-tested offline.
+
+`create_provider()` picks the implementation from the environment:
+
+    LLM_PROVIDER=gemini|mock        (default: gemini)
+    GEMINI_MODEL=gemini-pro         model name; context caching needs a
+                                    versioned model that supports it
+    MOCK_LLM_LATENCY_MS=800         mean response time
+    MOCK_LLM_JITTER_MS=200          +/- uniform jitter
+    MOCK_LLM_FAILURE_RATE=0.05      fraction of calls that raise
+    MOCK_LLM_SEED=0                 seed for latency/failure draws
+"""
+import datetime
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import namedtuple
+
+from prompt_templates import estimate_tokens
+
+DEFAULT_MODEL = 'gemini-pro'
+STREAM_CHUNKS = 8
+# Batched prompts label each patient "Patient ID: P<n>"
+BATCH_PATIENT_ID = re.compile(r'Patient ID: (P\d+)')
+# Share of its latency the mock saves on the cached part of a prompt
+MOCK_CACHED_SAVING = 0.5
+
+# A prompt prefix cached upstream; handle is whatever the provider needs
+CachedContext = namedtuple('CachedContext', 'name prefix tokens expires_at handle')
+
+MOCK_CONDITIONS = (
+    ('Common Cold', 'Viral infection of the upper respiratory tract.'),
+    ('Influenza', 'Seasonal viral illness with fever and body aches.'),
+    ('COVID-19', 'Respiratory illness caused by SARS-CoV-2.'),
+    ('Seasonal Allergies', 'Immune reaction to pollen or dust.'),
+    ('Migraine', 'Recurrent headache often with nausea and light sensitivity.'),
+    ('Gastroenteritis', 'Inflammation of the stomach and intestines.'),
+    ('Sinusitis', 'Inflammation of the sinuses, often after a cold.'),
+    ('Dehydration', 'Insufficient body fluids, causing fatigue and dizziness.'),
+)
+
+
+class ProviderError(Exception):
+    """Raised when a provider cannot produce a response"""
+
+
+class TransientProviderError(ProviderError):
+    """Raised for an upstream failure that a retry may get past"""
+
+
+class ProviderTimeout(TransientProviderError):
+    """Raised when a call does not finish within its timeout"""
+
+
+class ContextNotFound(ProviderError):
+    """Raised when a call names a cached context the provider no longer has"""
+
+
+class GeminiProvider:
+    """Google Gemini via the google-generativeai SDK"""
+
+    name = 'gemini'
+
+    def __init__(self, api_key, model_name=DEFAULT_MODEL):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt, timeout=None, context=None):
+        """Return the full response text for a prompt"""
+        try:
+            response = self._model_for(context).generate_content(
+                prompt, request_options=self._request_options(timeout))
+        except Exception as e:
+            raise self._context_error(e, context) from e
+        if not response or not response.text:
+            raise ProviderError('Empty response from model')
+        return response.text
+
+    def stream(self, prompt, timeout=None, context=None):
+        """Yield response text chunks as the model produces them"""
+        try:
+            response = self._model_for(context).generate_content(
+                prompt, stream=True,
+                request_options=self._request_options(timeout))
+        except Exception as e:
+            raise self._context_error(e, context) from e
+        for chunk in response:
+            yield chunk.text
+
+    def create_context(self, prefix, ttl):
+        """Upload a prompt prefix as cached content that lives for ttl seconds"""
+        expires_at = time.monotonic() + ttl
+        cache = self._genai.caching.CachedContent.create(
+            model=self._model.model_name, contents=[prefix],
+            ttl=datetime.timedelta(seconds=ttl))
+        model = self._genai.GenerativeModel.from_cached_content(cached_content=cache)
+        return CachedContext(cache.name, prefix,
+                             cache.usage_metadata.total_token_count,
+                             expires_at, (cache, model))
+
+    def refresh_context(self, context, ttl):
+        """Extend cached content to live another ttl seconds"""
+        expires_at = time.monotonic() + ttl
+        cache, _ = context.handle
+        cache.update(ttl=datetime.timedelta(seconds=ttl))
+        return context._replace(expires_at=expires_at)
+
+    def _model_for(self, context):
+        return context.handle[1] if context is not None else self._model
+
+    def _context_error(self, error, context):
+        """Tell a deleted or expired cached context apart from other errors"""
+        if (context is not None
+                and type(error).__name__ in ('NotFound', 'PermissionDenied')):
+            return ContextNotFound(f"Cached content {context.name} not found: {error}")
+        return error
+
+    def _request_options(self, timeout):
+        return {'timeout': timeout} if timeout else None
+
+
+class MockProvider:
+    """Deterministic local stand-in with injectable latency and failures"""
+
+    name = 'mock'
+
+    def __init__(self, latency=0.8, jitter=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self._contexts = {}  # name -> expiry, as the provider would hold them
+        self.contexts_created = 0
+        self.cached_calls = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+
+    def generate(self, prompt, timeout=None, context=None):
+        """Sleep for the configured latency and return a canned analysis"""
+        delay, fail = self._draw(prompt, context)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise ProviderTimeout('Mock response timed out')
+        time.sleep(delay)
+        if fail:
+            raise TransientProviderError('Injected mock failure')
+        return self.response_for(self._full_prompt(prompt, context))
+
+    def stream(self, prompt, timeout=None, context=None):
+        """Yield the canned analysis in chunks spread over the latency"""
+        delay, fail = self._draw(prompt, context)
+        text = self.response_for(self._full_prompt(prompt, context))
+        size = -(-len(text) // STREAM_CHUNKS)
+        started = time.monotonic()
+        for i in range(STREAM_CHUNKS):
+            time.sleep(delay / STREAM_CHUNKS)
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise ProviderTimeout('Mock stream timed out')
+            if fail and i == STREAM_CHUNKS // 2:
+                raise TransientProviderError('Injected mock failure')
+            yield text[i * size:(i + 1) * size]
+
+    def response_for(self, prompt):
+        """Return the analysis JSON for a prompt; same prompt, same answer"""
+        patient_ids = BATCH_PATIENT_ID.findall(prompt)
+        if patient_ids:
+            analyses = []
+            for patient_id in patient_ids:
+                analysis = self._analysis(f"{patient_id}\n{prompt}")
+                analysis['patient_id'] = patient_id
+                analyses.append(analysis)
+            return json.dumps(analyses, indent=2)
+        return json.dumps(self._analysis(prompt), indent=2)
+
+    def _analysis(self, prompt):
+        digest = hashlib.sha256(prompt.encode('utf-8')).digest()
+        picks = []
+        for byte in digest:
+            condition = MOCK_CONDITIONS[byte % len(MOCK_CONDITIONS)]
+            if condition not in picks:
+                picks.append(condition)
+            if len(picks) == 3:
+                break
+        analysis = {
+            'diseases': [
+                {'name': name, 'confidence': 80 - 20 * rank,
+                 'description': description,
+                 'risk_factors': ['Recent exposure to sick contacts']}
+                for rank, (name, description) in enumerate(picks)
+            ],
+            'treatments': ['Rest', 'Stay hydrated'],
+            'seek_medical_attention': digest[-1] % 4 == 0,
+            'severity_level': 20 + digest[-2] % 60,
+            'preventive_measures': ['Wash hands frequently'],
+            'follow_up': ['See a doctor if symptoms persist beyond a week'],
+            'immediate_actions': ['Monitor your temperature'],
+        }
+        return analysis
+
+    def create_context(self, prefix, ttl):
+        """Pretend to cache a prompt prefix upstream for ttl seconds"""
+        with self._lock:
+            self.contexts_created += 1
+            name = f"cachedContents/mock-{self.contexts_created}"
+            expires_at = time.monotonic() + ttl
+            self._contexts[name] = expires_at
+        return CachedContext(name, prefix, estimate_tokens(prefix), expires_at, None)
+
+    def refresh_context(self, context, ttl):
+        """Extend a pretend cached prefix by ttl seconds"""
+        with self._lock:
+            if self._contexts.get(context.name, 0) <= time.monotonic():
+                raise ContextNotFound(f"Cached content {context.name} not found")
+            expires_at = time.monotonic() + ttl
+            self._contexts[context.name] = expires_at
+        return context._replace(expires_at=expires_at)
+
+    def drop_contexts(self):
+        """Forget every cached prefix, as if it were deleted upstream"""
+        with self._lock:
+            self._contexts.clear()
+
+    def stats(self):
+        """Return call, injected failure and cached token counts"""
+        with self._lock:
+            return {'calls': self.calls, 'failures': self.failures,
+                    'contexts_created': self.contexts_created,
+                    'cached_calls': self.cached_calls,
+                    'input_tokens': self.input_tokens,
+                    'cached_tokens': self.cached_tokens}
+
+    def _full_prompt(self, prompt, context):
+        """The prompt as the model sees it; same prompt, same answer"""
+        return prompt if context is None else context.prefix + prompt
+
+    def _draw(self, prompt, context):
+        tokens = estimate_tokens(prompt)
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += tokens
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            if context is not None:
+                if self._contexts.get(context.name, 0) <= time.monotonic():
+                    raise ContextNotFound(f"Cached content {context.name} not found")
+                self.cached_calls += 1
+                self.cached_tokens += context.tokens
+                # The mock latency is for a whole prompt; the cached part is cheaper
+                delay *= 1 - MOCK_CACHED_SAVING * context.tokens / (context.tokens + tokens)
+            fail = self._random.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+        return max(0.0, delay), fail
+
+
+def create_provider(api_key=None, name=None):
+    """Build the provider named by LLM_PROVIDER, or None if it fails to start"""
+    name = (name or os.environ.get('LLM_PROVIDER', 'gemini')).lower()
+    try:
+        if name == 'mock':
+            provider = MockProvider(
+                latency=float(os.environ.get('MOCK_LLM_LATENCY_MS', 800)) / 1000,
+                jitter=float(os.environ.get('MOCK_LLM_JITTER_MS', 0)) / 1000,
+                failure_rate=float(os.environ.get('MOCK_LLM_FAILURE_RATE', 0)),
+                seed=int(os.environ.get('MOCK_LLM_SEED', 0)))
+        elif name == 'gemini':
+            provider = GeminiProvider(
+                api_key, os.environ.get('GEMINI_MODEL', DEFAULT_MODEL))
+        else:
+            raise ValueError(f"Unknown LLM provider '{name}'")
+    except Exception as e:
+        print(f"Error initializing {name} provider: {e}")
+        return None
+    print(f"Using {provider.name} language model provider")
+    return provider
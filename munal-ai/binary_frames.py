@@ -0,0 +1,159 @@
+"""Compact binary sensor frames exchanged with the Mega firmware.
+
+Frame layout (all integers little-endian):
+
+    0xA5 0x5A | len | payload (len bytes) | crc16 (2 bytes)
+
+The CRC is CRC-16/CCITT-FALSE over `len` and the payload. Payload version 1
+is `FRAME_V1` below; newer firmware may append fields, which older decoders
+ignore. The firmware starts in JSON mode and only switches to binary frames
+after the host sends `BINARY_COMMAND` and it answers with an acknowledgement
+line, so firmware without binary support keeps working over JSON.
+"""
+import struct
+import time
+
+SYNC = b'\xa5\x5a'
+PROTOCOL_VERSION = 1
+BINARY_COMMAND = b'B1\n'
+JSON_COMMAND = b'J\n'
+ACK_MARKER = b'"proto":"binary"'
+HANDSHAKE_TIMEOUT = 0.3  # seconds
+# Firmware BINARY_SERIAL_UPDATE_INTERVAL
+BINARY_FRAME_INTERVAL = 0.02  # seconds
+
+# version, seq, heart_rate, temperature (centi-degC), moisture,
+# raw_heartbeat, sensor_errors, comm_errors
+FRAME_V1 = struct.Struct('<BHHhBHHH')
+
+
+def _crc16_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return tuple(table)
+
+
+CRC16_TABLE = _crc16_table()
+
+
+def crc16(data):
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF)"""
+    crc = 0xFFFF
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ CRC16_TABLE[(crc >> 8) ^ byte]
+    return crc
+
+
+def encode_frame(data, seq=0):
+    """Encode a sensor reading as a version 1 binary frame"""
+    payload = FRAME_V1.pack(
+        PROTOCOL_VERSION,
+        seq & 0xFFFF,
+        int(data.get('heart_rate', 0)),
+        int(round(float(data.get('temperature', 0.0)) * 100)),
+        int(data.get('moisture', 0)),
+        int(data.get('raw_heartbeat', 0)),
+        int(data.get('sensor_errors', 0)),
+        int(data.get('comm_errors', 0)))
+    body = bytes([len(payload)]) + payload
+    return SYNC + body + struct.pack('<H', crc16(body))
+
+
+class BinaryFrameDecoder:
+    """Reassemble binary frames from a byte stream, resyncing on corruption"""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._last_seq = None
+        self.crc_errors = 0
+        self.resyncs = 0
+        self.seq_gaps = 0
+        self.unsupported = 0
+
+    def feed(self, chunk):
+        """Consume raw bytes and return the decoded frames as dicts"""
+        buf = self._buf
+        buf += chunk
+        frames = []
+        while True:
+            start = buf.find(SYNC)
+            if start < 0:
+                # Keep a trailing first sync byte; the second may be in flight
+                del buf[:-1 if buf.endswith(SYNC[:1]) else len(buf)]
+                break
+            if start:
+                del buf[:start]
+                self.resyncs += 1
+            if len(buf) < 3:
+                break
+            length = buf[2]
+            total = 3 + length + 2
+            if len(buf) < total:
+                break
+            body = bytes(buf[2:3 + length])
+            crc = buf[3 + length] | (buf[4 + length] << 8)
+            if crc16(body) != crc:
+                self.crc_errors += 1
+                del buf[:1]
+                continue
+            del buf[:total]
+            frame = self._unpack(body[1:])
+            if frame is not None:
+                frames.append(frame)
+        return frames
+
+    def stats(self):
+        """Return decoder error counters"""
+        return {
+            'crc_errors': self.crc_errors,
+            'resyncs': self.resyncs,
+            'seq_gaps': self.seq_gaps,
+            'unsupported': self.unsupported,
+        }
+
+    def _unpack(self, payload):
+        if len(payload) < FRAME_V1.size or payload[0] < PROTOCOL_VERSION:
+            self.unsupported += 1
+            return None
+        (_, seq, heart_rate, temperature, moisture, raw_heartbeat,
+         sensor_errors, comm_errors) = FRAME_V1.unpack_from(payload)
+        if self._last_seq is not None and seq != (self._last_seq + 1) & 0xFFFF:
+            self.seq_gaps += 1
+        self._last_seq = seq
+        return {
+            'heart_rate': heart_rate,
+            'temperature': temperature / 100.0,
+            'moisture': moisture,
+            'raw_heartbeat': raw_heartbeat,
+            'sensor_errors': sensor_errors,
+            'comm_errors': comm_errors,
+        }
+
+
+def negotiate(ser, timeout=HANDSHAKE_TIMEOUT):
+    """Ask the firmware for binary frames.
+
+    Returns (True, leftover_bytes) if the firmware acknowledged, or
+    (False, leftover_bytes) if it kept sending JSON.
+    """
+    read_timeout = ser.timeout
+    ser.timeout = 0.05
+    try:
+        ser.write(BINARY_COMMAND)
+        ser.flush()
+        deadline = time.monotonic() + timeout
+        received = b''
+        while time.monotonic() < deadline:
+            received += ser.read(max(1, ser.in_waiting))
+            marker = received.find(ACK_MARKER)
+            if marker >= 0:
+                end = received.find(b'\n', marker)
+                if end >= 0:
+                    return True, received[end + 1:]
+        return False, received
+    finally:
+        ser.timeout = read_timeout
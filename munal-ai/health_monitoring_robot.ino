@@ -125,10 +125,34 @@ byte customChar[8][8] = {
 // Communication timing
 #define SENSOR_UPDATE_INTERVAL 50    // Update sensors every 50ms
 #define SERIAL_UPDATE_INTERVAL 100   // Send data every 100ms
+#define BINARY_SERIAL_UPDATE_INTERVAL 20  // Send binary frames every 20ms
 unsigned long lastSensorUpdate = 0;
 unsigned long lastSerialUpdate = 0;
 bool serialConnected = false;
 
+// Binary frame protocol (see munal-ai/binary_frames.py)
+// Frame: 0xA5 0x5A | len | payload | crc16 (CCITT-FALSE over len + payload)
+#define FRAME_SYNC_1 0xA5
+#define FRAME_SYNC_2 0x5A
+#define PROTOCOL_VERSION 1
+#define COMMAND_BUFFER_SIZE 8
+
+struct __attribute__((packed)) SensorFrame {
+  uint8_t version;
+  uint16_t seq;
+  uint16_t heartRate;
+  int16_t temperatureCenti;
+  uint8_t moisture;
+  uint16_t rawHeartbeat;
+  uint16_t sensorErrors;
+  uint16_t commErrors;
+};
+
+bool binaryMode = false;       // JSON until the host asks for binary frames
+uint16_t frameSeq = 0;
+char commandBuffer[COMMAND_BUFFER_SIZE];
+byte commandLength = 0;
+
 // Error counters
 int sensorErrors = 0;
 int communicationErrors = 0;
@@ -192,10 +216,18 @@ void loop() {
     checkObstaclesAndMove();
   }
   
+  // Handle protocol commands from the host
+  readSerialCommands();
+  
   // Send data at regular interval
-  if (currentMillis - lastSerialUpdate >= SERIAL_UPDATE_INTERVAL) {
+  unsigned long serialInterval = binaryMode ? BINARY_SERIAL_UPDATE_INTERVAL : SERIAL_UPDATE_INTERVAL;
+  if (currentMillis - lastSerialUpdate >= serialInterval) {
     lastSerialUpdate = currentMillis;
-    sendSensorData();
+    if (binaryMode) {
+      sendBinaryFrame();
+    } else {
+      sendSensorData();
+    }
   }
   
   // Check for serial connection
@@ -286,21 +318,91 @@ void displayHealthInfo() {
   lcd.print("%");
 }
 
+void readSerialCommands() {
+  // Commands are short newline-terminated lines:
+  //   "B1" - switch to binary frames (protocol version 1)
+  //   "J"  - switch back to JSON lines
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (c == '\n' || c == '\r') {
+      commandBuffer[commandLength] = '\0';
+      if (strcmp(commandBuffer, "B1") == 0) {
+        Serial.println(F("{\"proto\":\"binary\",\"version\":1}"));
+        binaryMode = true;
+        frameSeq = 0;
+      } else if (strcmp(commandBuffer, "J") == 0) {
+        binaryMode = false;
+      }
+      commandLength = 0;
+    } else if (commandLength < COMMAND_BUFFER_SIZE - 1) {
+      commandBuffer[commandLength++] = c;
+    } else {
+      commandLength = 0;  // Overlong command, discard it
+    }
+  }
+}
+
+uint16_t crc16Update(uint16_t crc, uint8_t data) {
+  crc ^= (uint16_t)data << 8;
+  for (byte i = 0; i < 8; i++) {
+    crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+  }
+  return crc;
+}
+
+void sendBinaryFrame() {
+  if (!serialConnected) return;
+  
+  SensorFrame frame;
+  frame.version = PROTOCOL_VERSION;
+  frame.seq = frameSeq++;
+  frame.heartRate = heartRate;
+  frame.temperatureCenti = (int16_t)(temperature * 100);
+  frame.moisture = moistureLevel;
+  frame.rawHeartbeat = analogRead(HEARTBEAT_PIN);
+  frame.sensorErrors = sensorErrors;
+  frame.commErrors = communicationErrors;
+  
+  uint8_t header[3] = {FRAME_SYNC_1, FRAME_SYNC_2, sizeof(SensorFrame)};
+  uint16_t crc = crc16Update(0xFFFF, header[2]);
+  const uint8_t* payload = (const uint8_t*)&frame;
+  for (byte i = 0; i < sizeof(SensorFrame); i++) {
+    crc = crc16Update(crc, payload[i]);
+  }
+  uint8_t trailer[2] = {(uint8_t)(crc & 0xFF), (uint8_t)(crc >> 8)};
+  
+  size_t written = Serial.write(header, sizeof(header));
+  written += Serial.write(payload, sizeof(SensorFrame));
+  written += Serial.write(trailer, sizeof(trailer));
+  if (written == sizeof(header) + sizeof(SensorFrame) + sizeof(trailer)) {
+    if (communicationErrors > 0) communicationErrors--;
+  } else {
+    communicationErrors++;
+    serialConnected = false;
+  }
+}
+
 void sendSensorData() {
   if (!serialConnected) return;
   
-  // Create JSON string with error counts
-  String jsonData = "{";
-  jsonData += "\"heart_rate\":" + String(heartRate) + ",";
-  jsonData += "\"temperature\":" + String(temperature, 1) + ",";
-  jsonData += "\"moisture\":" + String(moistureLevel) + ",";
-  jsonData += "\"raw_heartbeat\":" + String(analogRead(HEARTBEAT_PIN)) + ",";
-  jsonData += "\"sensor_errors\":" + String(sensorErrors) + ",";
-  jsonData += "\"comm_errors\":" + String(communicationErrors);
-  jsonData += "}";
+  // Write the JSON line piecewise so no String is allocated on the heap
+  size_t written = 0;
+  written += Serial.print(F("{\"heart_rate\":"));
+  written += Serial.print(heartRate);
+  written += Serial.print(F(",\"temperature\":"));
+  written += Serial.print(temperature, 1);
+  written += Serial.print(F(",\"moisture\":"));
+  written += Serial.print(moistureLevel);
+  written += Serial.print(F(",\"raw_heartbeat\":"));
+  written += Serial.print(analogRead(HEARTBEAT_PIN));
+  written += Serial.print(F(",\"sensor_errors\":"));
+  written += Serial.print(sensorErrors);
+  written += Serial.print(F(",\"comm_errors\":"));
+  written += Serial.print(communicationErrors);
+  written += Serial.println(F("}"));
   
   // Try to send data
-  if (Serial.println(jsonData)) {
+  if (written) {
     // Data sent successfully
     if (communicationErrors > 0) communicationErrors--;
   } else {
@@ -0,0 +1,136 @@
+"""Streaming heart-rate estimation from the raw pulse sensor signal.
+
+The firmware only counts threshold crossings over 10 s, so its BPM changes
+every 10 s in steps of 6. `HeartRateEstimator` instead consumes every
+`raw_heartbeat` sample as it arrives: a band-pass filter (two biquads,
+0.7-3.5 Hz, i.e. 42-210 BPM) removes baseline drift and noise, peaks are
+found against an adaptive amplitude threshold and refined with parabolic
+interpolation, and BPM is taken from the median inter-beat interval over a
+sliding window. Confidence falls with beat-to-beat variability, too few
+beats, or a lost signal. Each sample costs O(1), so the estimate updates with
+every frame at any sample rate (10 Hz JSON frames, 50 Hz binary frames).
+"""
+import math
+from collections import deque
+from statistics import median, pstdev
+
+LOW_CUTOFF_HZ = 0.7
+HIGH_CUTOFF_HZ = 3.5
+WINDOW_SECONDS = 8.0
+# Shortest and longest plausible beat intervals (200 and 40 BPM)
+MIN_IBI = 0.3
+MAX_IBI = 1.5
+# Below this filtered amplitude (ADC counts) there is no finger on the sensor
+MIN_AMPLITUDE = 3.0
+# Peaks must reach this fraction of the recent signal envelope
+THRESHOLD_RATIO = 0.4
+ENVELOPE_HALF_LIFE = 2.0  # seconds
+SIGNAL_TIMEOUT = 2.5  # seconds without a beat before confidence drops to 0
+
+
+class Biquad:
+    """Second-order IIR section (transposed direct form II)"""
+
+    __slots__ = ('b0', 'b1', 'b2', 'a1', 'a2', 'z1', 'z2')
+
+    def __init__(self, kind, cutoff, sample_rate, q=math.sqrt(0.5)):
+        w0 = 2 * math.pi * cutoff / sample_rate
+        cos_w0 = math.cos(w0)
+        alpha = math.sin(w0) / (2 * q)
+        a0 = 1 + alpha
+        if kind == 'lowpass':
+            b0 = b2 = (1 - cos_w0) / 2
+            b1 = 1 - cos_w0
+        else:  # highpass
+            b0 = b2 = (1 + cos_w0) / 2
+            b1 = -(1 + cos_w0)
+        self.b0, self.b1, self.b2 = b0 / a0, b1 / a0, b2 / a0
+        self.a1, self.a2 = -2 * cos_w0 / a0, (1 - alpha) / a0
+        self.z1 = self.z2 = 0.0
+
+    def step(self, x):
+        y = self.b0 * x + self.z1
+        self.z1 = self.b1 * x - self.a1 * y + self.z2
+        self.z2 = self.b2 * x - self.a2 * y
+        return y
+
+
+class HeartRateEstimator:
+    """Band-pass, peak-detect and average inter-beat intervals into BPM"""
+
+    def __init__(self, sample_rate, window=WINDOW_SECONDS):
+        self.window = window
+        self.reset(sample_rate)
+
+    def reset(self, sample_rate=None):
+        """Clear filter and beat state, optionally at a new sample rate"""
+        if sample_rate is not None:
+            self.sample_rate = float(sample_rate)
+        fs = self.sample_rate
+        high = min(HIGH_CUTOFF_HZ, 0.45 * fs)
+        self._highpass = Biquad('highpass', LOW_CUTOFF_HZ, fs)
+        self._lowpass = Biquad('lowpass', high, fs)
+        self._envelope_decay = 0.5 ** (1.0 / (ENVELOPE_HALF_LIFE * fs))
+        self._envelope = 0.0
+        self._prev = [0.0, 0.0]
+        self._n = 0
+        self._peaks = deque()
+        self._primed = False
+
+    def process(self, samples):
+        """Feed a batch of raw ADC samples in arrival order"""
+        fs = self.sample_rate
+        refractory = MIN_IBI * fs
+        decay = self._envelope_decay
+        hp = self._highpass.step
+        lp = self._lowpass.step
+        y2, y1 = self._prev
+        for raw in samples:
+            if not self._primed:
+                # Start the high-pass from the first sample's DC level
+                for _ in range(int(fs)):
+                    lp(hp(float(raw)))
+                self._primed = True
+            y0 = lp(hp(float(raw)))
+            self._envelope = max(abs(y0), self._envelope * decay)
+            threshold = max(MIN_AMPLITUDE, THRESHOLD_RATIO * self._envelope)
+            if y1 > y2 and y1 >= y0 and y1 > threshold:
+                denom = y2 - 2 * y1 + y0
+                offset = 0.5 * (y2 - y0) / denom if denom else 0.0
+                peak = self._n - 1 + offset
+                if not self._peaks or peak - self._peaks[-1] >= refractory:
+                    self._peaks.append(peak)
+            y2, y1 = y1, y0
+            self._n += 1
+        self._prev = [y2, y1]
+
+        horizon = self._n - self.window * fs
+        while self._peaks and self._peaks[0] < horizon:
+            self._peaks.popleft()
+
+    def estimate(self):
+        """Return (bpm, confidence 0-1) from the current window"""
+        fs = self.sample_rate
+        if not self._peaks or (self._n - self._peaks[-1]) / fs > SIGNAL_TIMEOUT:
+            return 0, 0.0
+        peaks = list(self._peaks)
+        intervals = [(b - a) / fs for a, b in zip(peaks, peaks[1:])]
+        intervals = [i for i in intervals if MIN_IBI <= i <= MAX_IBI]
+        if len(intervals) < 2:
+            return 0, 0.0
+        ibi = median(intervals)
+        variation = pstdev(intervals) / (sum(intervals) / len(intervals))
+        confidence = max(0.0, 1.0 - variation / 0.25) * min(1.0, len(intervals) / 4)
+        return int(round(60.0 / ibi)), round(confidence, 2)
+
+    def stats(self):
+        """Return the current estimate and signal state for monitoring"""
+        bpm, confidence = self.estimate()
+        return {
+            'sample_rate': self.sample_rate,
+            'samples': self._n,
+            'beats_in_window': len(self._peaks),
+            'envelope': round(self._envelope, 1),
+            'bpm': bpm,
+            'confidence': confidence,
+        }
@@ -0,0 +1,113 @@
+"""Micro-batching of analysis requests into shared model calls.
+
+Callers block in `submit()` while a dispatcher thread gathers requests until
+either `max_batch` are waiting or the oldest has waited `max_wait` seconds,
+then hands the whole batch to `run_batch` on a small worker pool. `run_batch`
+returns one result per request, in order; a None result tells that caller to
+fall back to an individual request, so one bad element never fails the batch.
+If `run_batch` raises, the whole call failed (usually upstream), and every
+caller in the batch gets that exception from `submit()` instead: falling back
+to one request each would turn a failing call into `max_batch` more of them.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_BATCH = 4
+MAX_WAIT = 0.05  # seconds
+
+
+class _Pending:
+    __slots__ = ('item', 'result', 'error', 'done', 'enqueued')
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+        self.enqueued = time.monotonic()
+
+
+class MicroBatcher:
+    """Collect concurrent requests into batches for a batch function"""
+
+    def __init__(self, run_batch, max_batch=MAX_BATCH, max_wait=MAX_WAIT,
+                 workers=2):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending = []
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='batch')
+        self.batches = 0
+        self.items = 0
+        self.fallbacks = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """Queue an item and block until its batch returns; None means retry alone.
+
+        Raises the batch call's exception if the whole call failed.
+        """
+        pending = _Pending(item)
+        with self._cond:
+            self._pending.append(pending)
+            self._cond.notify()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def stats(self):
+        """Return batch counts, mean batch size, per-item fallbacks and failures"""
+        with self._cond:
+            return {
+                'batches': self.batches,
+                'items': self.items,
+                'mean_batch_size': round(self.items / self.batches, 2)
+                if self.batches else 0,
+                'fallbacks': self.fallbacks,
+                'failed': self.failed,
+                'waiting': len(self._pending),
+            }
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = self._pending[0].enqueued + self.max_wait
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                self.batches += 1
+                self.items += len(batch)
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch):
+        try:
+            results = self.run_batch([p.item for p in batch])
+        except Exception as e:
+            print(f"Batch of {len(batch)} failed: {e}")
+            with self._cond:
+                self.failed += len(batch)
+            for pending in batch:
+                pending.error = e
+                pending.done.set()
+            return
+        failed = 0
+        for i, pending in enumerate(batch):
+            pending.result = results[i] if i < len(results) else None
+            if pending.result is None:
+                failed += 1
+            pending.done.set()
+        if failed:
+            with self._cond:
+                self.fallbacks += failed
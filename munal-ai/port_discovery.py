@@ -0,0 +1,186 @@
+"""Serial port discovery and baud-rate detection for the Arduino Mega.
+
+Every candidate port is probed in parallel. A port/baud pair only counts as
+found once a valid JSON sensor frame has been read from it, so a wrong baud
+rate is never accepted just because the device opened. The last good pair is
+cached on disk and tried first on the next start or reconnect, and hotplug
+events (udev when `pyudev` is installed, a cheap device-list scan otherwise)
+replace the fixed retry sleep.
+"""
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import serial
+import serial.tools.list_ports
+
+try:
+    import pyudev
+except ImportError:
+    pyudev = None
+
+# Firmware SERIAL_BAUD_RATE first, then the legacy sketch rate
+BAUD_RATES = (115200, 9600)
+# Long enough to see a couple of 100 ms frames at each rate
+PROBE_WINDOW = 0.35  # seconds
+# Device-list scan interval when udev is unavailable
+HOTPLUG_POLL_INTERVAL = 0.1  # seconds
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          '.serial_port.json')
+FRAME_FIELDS = ('heart_rate', 'temperature', 'moisture', 'raw_heartbeat')
+
+
+def looks_like_frame(line):
+    """Return True if a raw line is a JSON sensor frame"""
+    try:
+        frame = json.loads(line)
+    except ValueError:
+        return False
+    return isinstance(frame, dict) and any(f in frame for f in FRAME_FIELDS)
+
+
+class PortDiscovery:
+    """Find the Arduino port and baud rate, remembering the last good pair"""
+
+    def __init__(self, baud_rates=BAUD_RATES, probe_window=PROBE_WINDOW,
+                 cache_path=CACHE_PATH, frame_check=looks_like_frame,
+                 hello=None):
+        self.baud_rates = tuple(baud_rates)
+        self.hello = hello
+        self.probe_window = probe_window
+        self.cache_path = cache_path
+        self.frame_check = frame_check
+        self._monitor = None
+        self._known_ports = set()
+        if pyudev is not None and sys.platform.startswith('linux'):
+            try:
+                context = pyudev.Context()
+                self._monitor = pyudev.Monitor.from_netlink(context)
+                self._monitor.filter_by('tty')
+                self._monitor.start()
+            except Exception as e:
+                print(f"udev monitor unavailable, falling back to polling: {e}")
+                self._monitor = None
+
+    def candidate_ports(self):
+        """List serial ports that could be the Arduino"""
+        if sys.platform.startswith('linux'):  # Raspberry Pi
+            return sorted(glob.glob('/dev/ttyUSB*') + glob.glob('/dev/ttyACM*'))
+        # Windows/Other OS (for development)
+        ports = serial.tools.list_ports.comports()
+        return [p.device for p in ports
+                if "Arduino" in p.description or "CH340" in p.description]
+
+    def load_cached(self):
+        """Return the last good (port, baud) pair, or (None, None)"""
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+            return cached['port'], int(cached['baud'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, None
+
+    def remember(self, port, baud):
+        """Persist a working port/baud pair for the next start"""
+        try:
+            with open(self.cache_path, 'w') as f:
+                json.dump({'port': port, 'baud': baud}, f)
+        except OSError as e:
+            print(f"Could not cache serial port: {e}")
+
+    def probe(self, port, baud_rates):
+        """Open a port and return it at the first baud rate that yields frames"""
+        try:
+            ser = serial.Serial()
+            ser.port = port
+            ser.baudrate = baud_rates[0]
+            ser.timeout = 0.05
+            ser.dtr = False  # avoid resetting the board on open where possible
+            ser.open()
+        except (serial.SerialException, OSError):
+            return None
+
+        for baud in baud_rates:
+            try:
+                ser.baudrate = baud
+                if self.hello:
+                    ser.write(self.hello)
+                ser.reset_input_buffer()
+                if self._saw_frame(ser):
+                    return ser
+            except (serial.SerialException, OSError):
+                break
+        ser.close()
+        return None
+
+    def connect(self):
+        """Probe all candidate ports in parallel and return an open port or None"""
+        ports = self.candidate_ports()
+        self._known_ports = set(ports)
+        if not ports:
+            print("No USB serial devices found")
+            return None
+
+        cached_port, cached_baud = self.load_cached()
+        orders = {}
+        for port in ports:
+            bauds = list(self.baud_rates)
+            if port == cached_port and cached_baud in bauds:
+                bauds.remove(cached_baud)
+                bauds.insert(0, cached_baud)
+            orders[port] = bauds
+
+        found = None
+        with ThreadPoolExecutor(max_workers=len(ports)) as pool:
+            futures = {port: pool.submit(self.probe, port, orders[port])
+                       for port in ports}
+            # Prefer the cached port when several devices answer
+            ordered = sorted(futures, key=lambda p: p != cached_port)
+            for port in ordered:
+                ser = futures[port].result()
+                if ser is None:
+                    continue
+                if found is None:
+                    found = ser
+                else:
+                    ser.close()
+
+        if found is None:
+            print("No Arduino Mega found")
+            return None
+        print(f"Found Arduino Mega on {found.port} at {found.baudrate} baud")
+        self.remember(found.port, found.baudrate)
+        return found
+
+    def wait_for_hotplug(self, timeout):
+        """Block until a serial device is added or timeout seconds pass"""
+        deadline = time.monotonic() + timeout
+        if self._monitor is not None:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                device = self._monitor.poll(timeout=remaining)
+                if device is not None and device.action == 'add':
+                    return True
+
+        while time.monotonic() < deadline:
+            if set(self.candidate_ports()) - self._known_ports:
+                return True
+            time.sleep(HOTPLUG_POLL_INTERVAL)
+        return False
+
+    def _saw_frame(self, ser):
+        deadline = time.monotonic() + self.probe_window
+        pending = b''
+        while time.monotonic() < deadline:
+            pending += ser.read(max(1, ser.in_waiting))
+            lines = pending.split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                if line.strip() and self.frame_check(line):
+                    return True
+        return False
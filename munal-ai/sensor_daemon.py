@@ -0,0 +1,308 @@
+"""Sensor acquisition, runnable in-process or as a standalone daemon.
+
+`SensorReader` owns the Arduino: it finds and opens the port, negotiates
+binary framing, decodes frames, runs the heart-rate estimator and hands
+every new `SensorSnapshot` to a callback. munal.py can run it on a thread
+of its own (the default), but then only one process may serve the app.
+
+Run as a daemon instead, the reader is the only process touching the
+serial port and publishes snapshots on a Unix socket:
+
+    python munal-ai/sensor_daemon.py --socket /tmp/munal-sensors.sock
+    SENSOR_SOCKET=/tmp/munal-sensors.sock python serve.py munal --workers 4
+
+Every app process then runs a `SensorSubscriber`, which only reads. The
+protocol is one request line per connection: `vitals` streams the same
+SSE-formatted frames /sensor_stream serves (latest frame first, keepalive
+comments while idle), `stats` returns the reader's counters as one JSON
+line. Frames keep the time the daemon read them, and a subscriber skips
+any frame it has already seen, such as the latest one replayed when it
+reconnects; a malformed frame is counted and skipped. Clients that stop
+reading are dropped by the `VitalsBroadcaster` fan-out rather than
+slowing the reader, and either side can restart without taking the
+other down.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import threading
+import time
+
+from binary_frames import (BINARY_FRAME_INTERVAL, JSON_COMMAND,
+                           BinaryFrameDecoder, negotiate)
+from heartbeat_dsp import HeartRateEstimator
+from port_discovery import PortDiscovery
+from sensor_snapshot import FRAME_FIELDS, SensorSnapshot
+from serial_ingest import FRAME_INTERVAL, FrameReader
+from vitals_pubsub import KEEPALIVE_INTERVAL, VitalsBroadcaster
+
+DEFAULT_SOCKET = '/tmp/munal-sensors.sock'
+# Heart rate is estimated from every raw pulse sample rather than taken from
+# the firmware's 10 s beat count; the firmware value is kept until the
+# estimate is confident
+MIN_HEART_RATE_CONFIDENCE = 0.5
+# Firmware left in binary mode by a previous run is switched back to JSON
+# while probing, then binary framing is negotiated once connected
+BINARY_FRAMES = True
+RECONNECT_TIMEOUT = 5  # seconds to wait for a hotplug event between scans
+SEND_TIMEOUT = 5  # seconds a daemon client may stall before it is dropped
+RETRY_INTERVAL = 1  # seconds between attempts to reach the daemon
+
+
+class SensorReader:
+    """Read the Arduino on a background thread and publish snapshots"""
+
+    def __init__(self, on_snapshot):
+        self.on_snapshot = on_snapshot
+        self.snapshot = SensorSnapshot.initial()
+        self.serial_port = None
+        self.port_discovery = PortDiscovery(hello=JSON_COMMAND)
+        self.heart_rate_estimator = HeartRateEstimator(sample_rate=1 / FRAME_INTERVAL)
+        self.frame_reader = FrameReader(
+            FRAME_FIELDS, sample_field='raw_heartbeat',
+            on_samples=self.heart_rate_estimator.process)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the reading thread unless it is already running"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def close_serial_port(self):
+        """Close the current serial port, ignoring errors from a vanished device"""
+        if self.serial_port:
+            try:
+                self.serial_port.close()
+            except Exception:
+                pass
+        self.serial_port = None
+
+    def run(self):
+        """Keep connecting to the Arduino and reading frames from it"""
+        while True:  # Keep trying to connect
+            try:
+                self.serial_port = self.port_discovery.connect()
+                if self.serial_port:
+                    self.read_port(self.serial_port)
+                    # Retry straight away; a USB blip usually re-enumerates at once
+                    self.close_serial_port()
+                else:
+                    print(f"Arduino Mega not found. Waiting up to {RECONNECT_TIMEOUT} seconds for a device...")
+                    self.port_discovery.wait_for_hotplug(RECONNECT_TIMEOUT)
+            except Exception as e:
+                print(f"Connection error: {e}")
+                self.close_serial_port()
+                self.port_discovery.wait_for_hotplug(RECONNECT_TIMEOUT)
+
+    def read_port(self, serial_port):
+        """Read frames from an open port until it fails"""
+        serial_port.timeout = 1
+        print(f"Connected to Arduino Mega on {serial_port.port}")
+        self.frame_reader.reset()
+        self.heart_rate_estimator.reset(1 / FRAME_INTERVAL)
+        if BINARY_FRAMES:
+            binary, leftover = negotiate(serial_port)
+            if binary:
+                print("Firmware supports binary frames, switching protocol")
+                self.frame_reader.use_binary(BinaryFrameDecoder(),
+                                             BINARY_FRAME_INTERVAL)
+                # Binary frames carry raw samples at 50 Hz
+                self.heart_rate_estimator.reset(1 / BINARY_FRAME_INTERVAL)
+                self.frame_reader.feed(leftover)
+
+        # Main reading loop; blocks in the driver until bytes arrive
+        while True:
+            try:
+                data = self.frame_reader.read_frame(serial_port)
+            except Exception as e:
+                print(f"Error reading data: {e}")
+                return  # reconnect
+            if data:
+                bpm, confidence = self.heart_rate_estimator.estimate()
+                data['heart_rate_confidence'] = confidence
+                if confidence >= MIN_HEART_RATE_CONFIDENCE:
+                    data['heart_rate'] = bpm
+                self.snapshot = self.snapshot.merge(data, time.time())
+                self.on_snapshot(self.snapshot)
+
+    def stats(self):
+        """Return ingestion and heart-rate counters"""
+        stats = self.frame_reader.stats()
+        stats['heart_rate'] = self.heart_rate_estimator.stats()
+        return stats
+
+
+class SensorServer:
+    """Serve a SensorReader's snapshots to app processes over a Unix socket"""
+
+    def __init__(self, path):
+        self.path = path
+        self.broadcaster = VitalsBroadcaster()
+        self.reader = SensorReader(on_snapshot=self.publish)
+        self._sock = None
+
+    def publish(self, snapshot):
+        self.broadcaster.publish(snapshot.encoded)
+
+    def serve_forever(self):
+        """Start the reader and accept clients until the socket is closed"""
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # left behind by a previous run
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.path)
+        self._sock.listen(16)
+        print(f"Publishing sensor frames on {self.path}")
+        self.reader.start()
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return  # closed by shutdown()
+            threading.Thread(target=self._serve_client, args=(conn,),
+                             daemon=True).start()
+
+    def shutdown(self):
+        """Stop accepting clients, remove the socket and release the port"""
+        if self._sock is not None:
+            self._sock.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.reader.close_serial_port()
+
+    def stats(self):
+        stats = self.reader.stats()
+        stats['clients'] = self.broadcaster.stats()
+        return stats
+
+    def _serve_client(self, conn):
+        with conn:
+            conn.settimeout(SEND_TIMEOUT)
+            try:
+                command = conn.makefile('rb').readline(64).strip()
+                if command == b'stats':
+                    conn.sendall(json.dumps(self.stats()).encode('utf-8') + b'\n')
+                elif command == b'vitals':
+                    self._stream(conn)
+            except OSError:
+                pass  # client went away or stalled
+
+    def _stream(self, conn):
+        subscriber = self.broadcaster.subscribe()
+        try:
+            for frame in subscriber.frames():
+                conn.sendall(frame)
+        finally:
+            self.broadcaster.unsubscribe(subscriber)
+
+
+class SensorSubscriber:
+    """Receive snapshots from a sensor daemon; same interface as SensorReader"""
+
+    def __init__(self, path, on_snapshot):
+        self.path = path
+        self.on_snapshot = on_snapshot
+        self.connected = False
+        self.received = 0
+        self.replayed = 0
+        self.malformed = 0
+        self.connects = 0
+        self._last_updated = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the receiving thread unless it is already running"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def run(self):
+        """Stay subscribed to the daemon, reconnecting whenever it drops"""
+        while True:
+            try:
+                with self._connect(b'vitals') as conn:
+                    # Keepalives arrive every KEEPALIVE_INTERVAL while idle
+                    conn.settimeout(KEEPALIVE_INTERVAL * 2)
+                    self.connected = True
+                    self.connects += 1
+                    print(f"Subscribed to sensor daemon on {self.path}")
+                    self._receive(conn.makefile('rb'))
+            except OSError as e:
+                if self.connected:
+                    print(f"Lost sensor daemon: {e}")
+            else:
+                print("Sensor daemon closed the connection")
+            self.connected = False
+            time.sleep(RETRY_INTERVAL)
+
+    def stats(self):
+        """Return the daemon's counters plus this subscription's state"""
+        try:
+            with self._connect(b'stats') as conn:
+                stats = json.loads(conn.makefile('rb').readline())
+        except (OSError, ValueError) as e:
+            stats = {'error': f"Sensor daemon unavailable: {e}"}
+        stats['daemon'] = {'socket': self.path, 'connected': self.connected,
+                           'received': self.received, 'replayed': self.replayed,
+                           'malformed': self.malformed, 'connects': self.connects}
+        return stats
+
+    def _connect(self, command):
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.settimeout(RETRY_INTERVAL)
+            conn.connect(self.path)
+            conn.sendall(command + b'\n')
+        except OSError:
+            conn.close()
+            raise
+        return conn
+
+    def _receive(self, stream):
+        """Turn `data:` lines of the SSE stream back into snapshots"""
+        for line in stream:
+            if not line.startswith(b'data: '):
+                continue
+            try:
+                payload = line[6:].decode('utf-8').rstrip('\n')
+                snapshot = SensorSnapshot.decode(payload, time.time())
+            except (ValueError, KeyError, TypeError) as e:
+                # A corrupt or version-skewed frame; keep the subscription
+                if not self.malformed:
+                    print(f"Skipping malformed sensor frame: {e!r}")
+                self.malformed += 1
+                continue
+            if (self._last_updated is not None and snapshot.updated_at is not None
+                    and snapshot.updated_at <= self._last_updated):
+                self.replayed += 1
+                continue
+            self._last_updated = snapshot.updated_at
+            self.received += 1
+            self.on_snapshot(snapshot)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--socket', default=os.environ.get('SENSOR_SOCKET', DEFAULT_SOCKET))
+    args = parser.parse_args()
+
+    server = SensorServer(args.socket)
+
+    def stop(signum, frame):
+        server.shutdown()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Immutable snapshots of the latest Arduino sensor values.
+
+The serial thread is the only writer: for every frame it builds a new
+`SensorSnapshot` from the previous one and rebinds a single module-level
+reference. Rebinding a name is atomic in CPython, so readers just take the
+current reference and use it without locks or copies; a snapshot never
+changes once published. Each snapshot carries its JSON encoding, built once
+by the writer, so HTTP and streaming consumers never re-serialise it. The
+encoding includes `updated_at`, so a snapshot relayed by the sensor daemon
+keeps the time it was read rather than the time it was received.
+`FRAME_FIELDS` are the values the firmware sends; the snapshot also records
+the confidence of the host-side heart-rate estimate.
+"""
+import json
+from collections import namedtuple
+
+VITAL_FIELDS = ('heart_rate', 'temperature', 'moisture', 'raw_heartbeat')
+FRAME_FIELDS = VITAL_FIELDS + ('sensor_errors', 'comm_errors')
+SENSOR_FIELDS = FRAME_FIELDS + ('heart_rate_confidence',)
+
+_SnapshotBase = namedtuple('_SnapshotBase',
+                           SENSOR_FIELDS + ('updated_at', 'encoded'))
+
+
+class SensorSnapshot(_SnapshotBase):
+    """Frozen record of one point-in-time set of sensor readings"""
+
+    __slots__ = ()
+
+    @classmethod
+    def initial(cls):
+        """Return the snapshot used before any frame has arrived"""
+        return cls.build({'heart_rate': 0, 'temperature': 0.0, 'moisture': 0,
+                          'raw_heartbeat': 0, 'sensor_errors': 0,
+                          'comm_errors': 0, 'heart_rate_confidence': 0.0},
+                         None)
+
+    @classmethod
+    def build(cls, values, updated_at):
+        """Create a snapshot from a complete mapping of sensor values"""
+        fields = {f: values[f] for f in SENSOR_FIELDS}
+        encoded = json.dumps(dict(fields, updated_at=updated_at),
+                             separators=(',', ':'))
+        return cls(updated_at=updated_at, encoded=encoded, **fields)
+
+    @classmethod
+    def decode(cls, encoded, received_at):
+        """Rebuild a snapshot from its JSON encoding, keeping that encoding.
+
+        Raises ValueError, KeyError or TypeError for a malformed encoding.
+        received_at stands in for the timestamp of an encoding without one.
+        """
+        values = json.loads(encoded)
+        fields = {f: values[f] for f in SENSOR_FIELDS}
+        updated_at = values.get('updated_at', received_at)
+        if updated_at is not None:
+            updated_at = float(updated_at)
+        return cls(updated_at=updated_at, encoded=encoded, **fields)
+
+    def merge(self, frame, updated_at):
+        """Return a new snapshot with the frame's known fields applied"""
+        values = self.as_dict()
+        for field in SENSOR_FIELDS:
+            if field in frame:
+                values[field] = frame[field]
+        return self.build(values, updated_at)
+
+    def as_dict(self):
+        """Return the sensor values as a plain dict"""
+        return {f: getattr(self, f) for f in SENSOR_FIELDS}
@@ -0,0 +1,165 @@
+"""Event-driven ingestion of the Arduino's newline-delimited JSON frames.
+
+Instead of polling `in_waiting` and sleeping, `FrameReader` blocks in the
+serial driver until bytes arrive, drains everything that is buffered in one
+read, splits complete frames on raw bytes and only parses as many of the
+newest frames as it needs to fill every field. Older frames in the same batch
+are superseded and counted as dropped. Once the firmware has agreed to binary
+framing, a `binary_frames.BinaryFrameDecoder` takes over from line splitting.
+A `sample_field` (e.g. the raw pulse signal) can be tapped before coalescing:
+every frame is then parsed and all of its values in the batch are handed to
+`on_samples` in arrival order.
+"""
+import json
+import threading
+import time
+
+# Firmware SERIAL_UPDATE_INTERVAL, used to estimate backlog lag
+FRAME_INTERVAL = 0.1  # seconds
+# Discard a partial frame that grows beyond this without a newline
+MAX_PENDING_BYTES = 4096
+
+
+class FrameReader:
+    """Drain a serial port in bulk and coalesce frames into the newest values"""
+
+    def __init__(self, fields, frame_interval=FRAME_INTERVAL,
+                 max_pending=MAX_PENDING_BYTES, sample_field=None,
+                 on_samples=None):
+        self.fields = frozenset(fields)
+        self.sample_field = sample_field
+        self.on_samples = on_samples
+        self.frame_interval = frame_interval
+        self.max_pending = max_pending
+        self._pending = b''
+        self._lock = threading.Lock()
+        self.decoder = None
+        self.bytes_read = 0
+        self.frames_received = 0
+        self.frames_applied = 0
+        self.frames_dropped = 0
+        self.parse_errors = 0
+        self.overflows = 0
+        self.backlog_frames = 0
+        self.ingest_lag_ms = 0.0
+        self.max_ingest_lag_ms = 0.0
+        self.last_frame_at = None
+
+    def reset(self):
+        """Forget any partial frame and fall back to JSON, e.g. after reconnecting"""
+        self._pending = b''
+        self.decoder = None
+        self.frame_interval = FRAME_INTERVAL
+
+    def use_binary(self, decoder, frame_interval):
+        """Decode subsequent bytes with a binary frame decoder"""
+        self._pending = b''
+        self.decoder = decoder
+        self.frame_interval = frame_interval
+
+    def read_frame(self, port):
+        """Block until data arrives and return the merged newest frame, or None"""
+        # read(1) sleeps in the driver until a byte arrives or the port
+        # timeout expires, so an idle port costs no CPU
+        chunk = port.read(1)
+        if not chunk:
+            return None
+        waiting = port.in_waiting
+        if waiting:
+            chunk += port.read(waiting)
+        return self.feed(chunk)
+
+    def feed(self, chunk):
+        """Split raw bytes into frames and return the newest value per field"""
+        if self.decoder is not None:
+            frames = self.decoder.feed(chunk)
+        else:
+            data = self._pending + chunk
+            lines = data.split(b'\n')
+            self._pending = lines.pop()
+            if len(self._pending) > self.max_pending:
+                self._pending = b''
+                self.overflows += 1
+            frames = [line for line in lines if line.strip()]
+        received = len(frames)
+        if self.on_samples is not None and frames:
+            frames = self._tap_samples(frames)
+
+        merged = {}
+        parsed = 0
+        for raw in reversed(frames):
+            parsed += 1
+            if isinstance(raw, dict):
+                frame = raw
+            else:
+                try:
+                    frame = json.loads(raw)
+                except ValueError:
+                    self.parse_errors += 1
+                    continue
+            if not isinstance(frame, dict):
+                self.parse_errors += 1
+                continue
+            for key, value in frame.items():
+                merged.setdefault(key, value)
+            if self.fields <= merged.keys():
+                break
+
+        with self._lock:
+            self.bytes_read += len(chunk)
+            self.frames_received += received
+            self.frames_dropped += len(frames) - parsed
+            if not merged:
+                return None
+            self.frames_applied += 1
+            self.backlog_frames = received
+            self.ingest_lag_ms = (received - 1) * self.frame_interval * 1000
+            self.max_ingest_lag_ms = max(self.max_ingest_lag_ms,
+                                         self.ingest_lag_ms)
+            self.last_frame_at = time.time()
+        return merged
+
+    def _tap_samples(self, frames):
+        """Parse every frame, pass on its sample values and return the dicts"""
+        parsed = []
+        for raw in frames:
+            if isinstance(raw, dict):
+                frame = raw
+            else:
+                try:
+                    frame = json.loads(raw)
+                except ValueError:
+                    self.parse_errors += 1
+                    continue
+            if not isinstance(frame, dict):
+                self.parse_errors += 1
+                continue
+            parsed.append(frame)
+        samples = [f[self.sample_field] for f in parsed
+                   if isinstance(f.get(self.sample_field), (int, float))]
+        if samples:
+            self.on_samples(samples)
+        return parsed
+
+    def stats(self):
+        """Return ingestion counters for monitoring"""
+        with self._lock:
+            age = None
+            if self.last_frame_at is not None:
+                age = round((time.time() - self.last_frame_at) * 1000, 1)
+            stats = {
+                'protocol': 'json' if self.decoder is None else 'binary',
+                'bytes_read': self.bytes_read,
+                'frames_received': self.frames_received,
+                'frames_applied': self.frames_applied,
+                'frames_dropped': self.frames_dropped,
+                'parse_errors': self.parse_errors,
+                'overflows': self.overflows,
+                'backlog_frames': self.backlog_frames,
+                'ingest_lag_ms': self.ingest_lag_ms,
+                'max_ingest_lag_ms': self.max_ingest_lag_ms,
+                'last_frame_age_ms': age,
+            }
+        if self.decoder is not None:
+            stats.update(self.decoder.stats())
+        return stats
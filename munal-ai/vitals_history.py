@@ -0,0 +1,130 @@
+"""Fixed-size, array-backed history of timestamped vital signs.
+
+Samples live in preallocated `array('d')` columns used as a ring buffer, so
+memory stays flat however long the bot runs and no per-sample dicts are
+kept. Window lookups binary-search the timestamp column and then only touch
+the samples inside the window.
+"""
+import threading
+from array import array
+
+
+class VitalsHistory:
+    """Ring buffer of vital-sign samples with windowed, downsampled queries"""
+
+    def __init__(self, fields, capacity, min_interval=0.0):
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self.min_interval = min_interval
+        self._times = array('d', bytes(8 * capacity))
+        self._columns = {f: array('d', bytes(8 * capacity)) for f in self.fields}
+        self._head = 0
+        self._size = 0
+        self._last_slot = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, sample):
+        """Record one sample; returns False if its min_interval slot is taken"""
+        with self._lock:
+            if self.min_interval > 0:
+                slot = int(timestamp // self.min_interval)
+                if slot == self._last_slot:
+                    return False
+                self._last_slot = slot
+            i = self._head
+            self._times[i] = timestamp
+            for field in self.fields:
+                try:
+                    self._columns[field][i] = float(sample.get(field) or 0)
+                except (TypeError, ValueError):
+                    self._columns[field][i] = 0.0
+            self._head = (i + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            return True
+
+    def query(self, since, until=None, resolution=0.0):
+        """Return samples in [since, until] as columns, averaged into
+        buckets of `resolution` seconds when resolution > 0"""
+        with self._lock:
+            lo = self._bisect(since)
+            hi = self._size if until is None else self._bisect_right(until)
+            times = self._slice(self._times, lo, hi)
+            columns = {f: self._slice(self._columns[f], lo, hi)
+                       for f in self.fields}
+
+        if resolution <= 0 or not times:
+            result = {'t': times.tolist()}
+            result.update({f: col.tolist() for f, col in columns.items()})
+            return result
+        return self._downsample(times, columns, since, resolution)
+
+    def stats(self):
+        """Return buffer occupancy and the time span it covers"""
+        with self._lock:
+            oldest = newest = None
+            if self._size:
+                oldest = self._times[self._physical(0)]
+                newest = self._times[self._physical(self._size - 1)]
+            return {
+                'samples': self._size,
+                'capacity': self.capacity,
+                'oldest': oldest,
+                'newest': newest,
+            }
+
+    def _physical(self, logical):
+        return (self._head - self._size + logical) % self.capacity
+
+    def _bisect(self, timestamp):
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._times[self._physical(mid)] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _bisect_right(self, timestamp):
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._times[self._physical(mid)] <= timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _slice(self, column, lo, hi):
+        if hi <= lo:
+            return array('d')
+        start = self._physical(lo)
+        count = hi - lo
+        if start + count <= self.capacity:
+            return column[start:start + count]
+        return column[start:] + column[:start + count - self.capacity]
+
+    def _downsample(self, times, columns, origin, resolution):
+        result = {'t': []}
+        result.update({f: [] for f in self.fields})
+        bucket = None
+        start = 0
+        for i, t in enumerate(times):
+            b = int((t - origin) // resolution)
+            if b != bucket:
+                if bucket is not None:
+                    self._emit_bucket(result, times, columns, start, i)
+                bucket = b
+                start = i
+        self._emit_bucket(result, times, columns, start, len(times))
+        return result
+
+    def _emit_bucket(self, result, times, columns, start, end):
+        count = end - start
+        result['t'].append(round(sum(times[start:end]) / count, 3))
+        for field in self.fields:
+            result[field].append(
+                round(sum(columns[field][start:end]) / count, 2))
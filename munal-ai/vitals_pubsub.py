@@ -0,0 +1,125 @@
+"""Publish/subscribe fan-out of live vitals to dashboard clients.
+
+The serial reader publishes each new frame once, already JSON-encoded; it is
+wrapped in an SSE frame a single time and the same bytes are handed to every
+subscriber.
+Each subscriber has a small bounded queue: when a client falls behind its
+oldest frames are dropped, and a client that keeps falling behind is
+disconnected so it cannot hold memory or slow the publisher down.
+"""
+import threading
+from queue import Empty, Full, Queue
+
+SUBSCRIBER_QUEUE_SIZE = 16
+# Consecutive drops before a slow consumer is disconnected
+MAX_CONSECUTIVE_DROPS = 64
+KEEPALIVE_INTERVAL = 15  # seconds
+KEEPALIVE = b': keepalive\n\n'
+
+
+class Subscriber:
+    """One connected client's bounded frame queue"""
+
+    def __init__(self, queue_size):
+        self.queue = Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.consecutive_drops = 0
+        self.closed = False
+
+    def offer(self, frame):
+        """Queue a frame without blocking, dropping the oldest if full"""
+        try:
+            self.queue.put_nowait(frame)
+            self.consecutive_drops = 0
+            return
+        except Full:
+            pass
+        try:
+            self.queue.get_nowait()
+        except Empty:
+            pass
+        try:
+            self.queue.put_nowait(frame)
+        except Full:
+            pass
+        self.dropped += 1
+        self.consecutive_drops += 1
+
+    def frames(self, keepalive=KEEPALIVE_INTERVAL):
+        """Yield encoded frames, with keepalive comments while idle"""
+        while not self.closed:
+            try:
+                frame = self.queue.get(timeout=keepalive)
+            except Empty:
+                yield KEEPALIVE
+                continue
+            if frame is None:
+                return
+            yield frame
+
+
+class VitalsBroadcaster:
+    """Fan a single stream of frames out to many SSE subscribers"""
+
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE,
+                 max_consecutive_drops=MAX_CONSECUTIVE_DROPS):
+        self.queue_size = queue_size
+        self.max_consecutive_drops = max_consecutive_drops
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._latest = None
+        self.published = 0
+        self.evicted = 0
+        self._departed_drops = 0
+
+    def subscribe(self):
+        """Register a new client, primed with the latest frame"""
+        subscriber = Subscriber(self.queue_size)
+        with self._lock:
+            if self._latest is not None:
+                subscriber.offer(self._latest)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Remove a client, e.g. when its connection closes"""
+        subscriber.closed = True
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.discard(subscriber)
+                self._departed_drops += subscriber.dropped
+
+    def publish(self, payload, event='vitals'):
+        """Wrap pre-encoded JSON in an SSE frame and offer it to every subscriber"""
+        frame = f"event: {event}\ndata: {payload}\n\n".encode('utf-8')
+        with self._lock:
+            self._latest = frame
+            self.published += 1
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(frame)
+            if subscriber.consecutive_drops >= self.max_consecutive_drops:
+                self._evict(subscriber)
+
+    def stats(self):
+        """Return subscriber counts and drop totals"""
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'evicted': self.evicted,
+                'dropped': self._departed_drops + sum(
+                    s.dropped for s in self._subscribers),
+            }
+
+    def _evict(self, subscriber):
+        with self._lock:
+            if subscriber not in self._subscribers:
+                return
+            self._subscribers.discard(subscriber)
+            self._departed_drops += subscriber.dropped
+            self.evicted += 1
+        print("Disconnecting slow vitals subscriber")
+        subscriber.closed = True
+        # Wake the client's generator so it can finish promptly
+        subscriber.offer(None)
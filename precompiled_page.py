@@ -0,0 +1,103 @@
+"""Serve a page that is rendered once instead of on every request.
+
+The apps' HTML templates have no per-request variables, so `PrecompiledPage`
+renders the template a single time, hashes the result into a strong ETag and
+keeps gzip (and, when the optional `brotli` package is installed, brotli)
+encodings alongside the plain bytes. A request then costs a header check: a
+matching If-None-Match gets a bodiless 304, otherwise the smallest encoding
+the client accepts is sent as-is.
+
+Built assets such as the stylesheet from build_css.py use the same class
+with an immutable Cache-Control and are linked under a content-hashed URL,
+so browsers never ask for them twice.
+"""
+import gzip
+import hashlib
+import os
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Long-lived but revalidated: reloads send If-None-Match and get a 304
+PAGE_CACHE_CONTROL = 'public, max-age=86400, must-revalidate'
+# Content-hashed URLs never change meaning, so caches may keep them forever
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+STYLESHEET = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'static', 'app.css')
+
+
+class PrecompiledPage:
+    """Rendered page bytes with an ETag and precompressed variants"""
+
+    def __init__(self, html, mimetype='text/html',
+                 cache_control=PAGE_CACHE_CONTROL):
+        body = html.encode('utf-8')
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = {'identity': body}
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            self.variants['gzip'] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(body, mode=brotli.MODE_TEXT, quality=11)
+            if len(compressed) < len(body):
+                self.variants['br'] = compressed
+
+    @classmethod
+    def from_template(cls, app, template, context=None, **kwargs):
+        """Render a Jinja template string once with the app's environment"""
+        html = app.jinja_env.from_string(template).render(context or {})
+        return cls(html, **kwargs)
+
+    @classmethod
+    def from_file(cls, path, mimetype, cache_control=ASSET_CACHE_CONTROL):
+        """Load a built asset from disk"""
+        with open(path, encoding='utf-8') as f:
+            return cls(f.read(), mimetype=mimetype, cache_control=cache_control)
+
+    @property
+    def version(self):
+        """Short content hash for cache-busting URLs"""
+        return self.etag[:12]
+
+    def response(self, request):
+        """Return a 304 or the best encoded variant for this request"""
+        headers = {
+            'ETag': f'"{self.etag}"',
+            'Cache-Control': self.cache_control,
+            'Vary': 'Accept-Encoding',
+        }
+        if request.if_none_match.contains_weak(self.etag):
+            return Response(status=304, headers=headers)
+
+        encoding = self.pick_encoding(request.accept_encodings)
+        body = self.variants[encoding]
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        headers['Content-Length'] = str(len(body))
+        return Response(body, mimetype=self.mimetype, headers=headers)
+
+    def pick_encoding(self, accepted):
+        """Choose the smallest variant the client accepts"""
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accepted.quality(encoding) > 0:
+                return encoding
+        return 'identity'
+
+    def stats(self):
+        """Return the ETag and the size of every variant"""
+        return {'etag': self.etag,
+                'bytes': {k: len(v) for k, v in self.variants.items()}}
+
+
+def load_stylesheet(path=STYLESHEET):
+    """Return the purged stylesheet, or None if build_css.py has not been run"""
+    if not os.path.exists(path):
+        print(f"No built stylesheet at {path}; pages will use the CDN")
+        return None
+    return PrecompiledPage.from_file(path, 'text/css')
@@ -0,0 +1,169 @@
+"""Precompiled prompt templates with token estimates and a hard budget.
+
+A `PromptTemplate` is a static prefix followed by a body with `{slot}`
+placeholders. The body is parsed once, and the token cost of the prefix
+and of the body's literal text is estimated once, at import. A render
+then only joins strings and estimates the slot values. The prefix is
+byte-identical on every call and comes first, so a provider can cache it.
+
+Tokens are estimated without a tokenizer: one per punctuation mark and
+one per four characters of each word. It is rough and errs high for
+ordinary English, which suits a budget; use it for limits and trends, not
+billing.
+
+A template may have a budget. When a render would exceed it, the slot
+named by `truncate` (the free-text symptoms) is cut at a word boundary
+and marked as truncated. If the other slots alone overrun the budget,
+`PromptTooLong` is raised before anything reaches the model.
+
+`TokenMetrics` records each prompt sent and each response received, for
+/llm/stats. Prompts whose prefix was served from a provider-side cache
+(context_cache.py) are counted separately, as is the part actually sent.
+"""
+import re
+import string
+import threading
+from collections import deque, namedtuple
+
+TOKEN = re.compile(r'\w+|[^\w\s]')
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARK = ' [truncated]'
+RECENT_PROMPTS = 1000  # prompts kept for the p95 figure
+
+RenderedPrompt = namedtuple('RenderedPrompt',
+                            'text tokens static_tokens truncated_tokens')
+
+
+class PromptTooLong(ValueError):
+    """Raised when a prompt cannot fit its token budget"""
+
+
+def estimate_tokens(text):
+    """Estimate how many tokens a model will count for text"""
+    return sum(-(-len(token) // CHARS_PER_TOKEN) for token in TOKEN.findall(text))
+
+
+def truncate_tokens(text, limit):
+    """Cut text to about limit tokens at a word boundary; returns (text, dropped)"""
+    used = 0
+    for match in TOKEN.finditer(text):
+        cost = -(-len(match.group()) // CHARS_PER_TOKEN)
+        if used + cost > limit:
+            dropped = estimate_tokens(text[match.start():])
+            return text[:match.start()].rstrip() + TRUNCATION_MARK, dropped
+        used += cost
+    return text, 0
+
+
+class PromptTemplate:
+    """Static prefix plus a body with slots, parsed and costed once"""
+
+    def __init__(self, prefix, body, budget=None, truncate=None):
+        self.prefix = prefix
+        self.budget = budget
+        self.truncate = truncate
+        self._parts = [(literal, field) for literal, field, _, _
+                       in string.Formatter().parse(body)]
+        self.slots = tuple(field for _, field in self._parts if field)
+        self.static_tokens = estimate_tokens(prefix)
+        # Everything but the slot values: the least any render can cost
+        self.fixed_tokens = self.static_tokens + sum(
+            estimate_tokens(literal) for literal, _ in self._parts)
+        self._truncation_cost = estimate_tokens(TRUNCATION_MARK)
+
+    def render(self, **slots):
+        """Fill the slots and return a RenderedPrompt within the budget"""
+        values, costs, truncated = {}, {}, 0
+        for name in self.slots:
+            value = slots[name]
+            if isinstance(value, RenderedPrompt):  # a nested template
+                truncated += value.truncated_tokens
+                value = value.text
+            values[name] = str(value)
+            costs[name] = estimate_tokens(values[name])
+        tokens = self.fixed_tokens + sum(costs.values())
+
+        if self.budget is not None and tokens > self.budget:
+            if self.truncate is None:
+                raise PromptTooLong(f"Prompt needs {tokens} tokens, "
+                                    f"budget is {self.budget}")
+            other = tokens - costs[self.truncate]
+            room = self.budget - other - self._truncation_cost
+            if room < 0:
+                raise PromptTooLong(f"Prompt needs {other} tokens before "
+                                    f"{self.truncate}, budget is {self.budget}")
+            values[self.truncate], dropped = truncate_tokens(values[self.truncate], room)
+            truncated += dropped
+            tokens = other + estimate_tokens(values[self.truncate])
+
+        text = self.prefix + ''.join(
+            literal + (values[field] if field else '') for literal, field in self._parts)
+        return RenderedPrompt(text, tokens, self.static_tokens, truncated)
+
+
+class TokenMetrics:
+    """Running token counts for the prompts sent and responses received"""
+
+    def __init__(self, budget=None):
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=RECENT_PROMPTS)
+        self.prompts = 0
+        self.prompt_tokens = 0
+        self.static_tokens = 0
+        self.max_prompt_tokens = 0
+        self.truncated = 0
+        self.truncated_tokens = 0
+        self.cached = 0
+        self.cached_tokens = 0
+        self.responses = 0
+        self.response_tokens = 0
+
+    def record_prompt(self, prompt, cached=False):
+        """Count a prompt about to be sent; cached if its prefix is upstream"""
+        with self._lock:
+            if cached:
+                self.cached += 1
+                self.cached_tokens += prompt.static_tokens
+            self.prompts += 1
+            self.prompt_tokens += prompt.tokens
+            self.static_tokens += prompt.static_tokens
+            self.max_prompt_tokens = max(self.max_prompt_tokens, prompt.tokens)
+            if prompt.truncated_tokens:
+                self.truncated += 1
+                self.truncated_tokens += prompt.truncated_tokens
+            self._recent.append(prompt.tokens)
+
+    def record_response(self, text):
+        """Count the text a prompt produced"""
+        tokens = estimate_tokens(text)
+        with self._lock:
+            self.responses += 1
+            self.response_tokens += tokens
+
+    def stats(self):
+        """Return totals, means and the p95 prompt size"""
+        with self._lock:
+            recent = sorted(self._recent)
+            return {
+                'budget': self.budget,
+                'prompts': self.prompts,
+                'prompt_tokens': self.prompt_tokens,
+                'mean_prompt_tokens': round(self.prompt_tokens / self.prompts, 1)
+                if self.prompts else 0,
+                'p95_prompt_tokens': recent[int(len(recent) * 0.95)] if recent else 0,
+                'max_prompt_tokens': self.max_prompt_tokens,
+                'static_share': round(self.static_tokens / self.prompt_tokens, 3)
+                if self.prompt_tokens else 0,
+                'truncated_prompts': self.truncated,
+                'truncated_tokens': self.truncated_tokens,
+                'cached_prompts': self.cached,
+                'cached_tokens': self.cached_tokens,
+                'mean_sent_tokens': round(
+                    (self.prompt_tokens - self.cached_tokens) / self.prompts, 1)
+                if self.prompts else 0,
+                'responses': self.responses,
+                'response_tokens': self.response_tokens,
+                'mean_response_tokens': round(self.response_tokens / self.responses, 1)
+                if self.responses else 0,
+            }
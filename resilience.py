@@ -0,0 +1,332 @@
+"""Client-side protection for calls to the language model.
+
+`ResilientProvider` wraps any provider from `llm_provider` and gives every
+call:
+
+- a token-bucket rate limit matched to the API quota; callers wait for a
+  token, but never past their deadline
+- a per-call deadline passed down to the provider
+- retries with full-jitter exponential backoff for transient errors
+  (quota, timeouts, 5xx), limited by a retry budget so retries can never
+  multiply load on an already struggling upstream
+- a circuit breaker that, after repeated upstream failures, fails calls
+  immediately for a cool-down period and then lets a single trial through
+
+Failures surface as `ProviderError`s, which the apps already turn into their
+fallback responses. `stats()` exposes the state of every part.
+
+Configuration comes from the environment:
+
+    LLM_RATE_LIMIT_RPM=60     quota in requests per minute
+    LLM_BURST=5               requests allowed back to back
+    LLM_DEADLINE=30           seconds per call, including waits and retries
+    LLM_MAX_RETRIES=2         retries per call
+    LLM_RETRY_RATIO=0.2       retries allowed per first attempt
+    LLM_BREAKER_FAILURES=5    consecutive failures that open the circuit
+    LLM_BREAKER_COOLDOWN=30   seconds the circuit stays open
+"""
+import os
+import random
+import threading
+import time
+
+from llm_provider import ProviderError, TransientProviderError
+
+RATE_LIMIT_RPM = float(os.environ.get('LLM_RATE_LIMIT_RPM', 60))
+BURST = int(os.environ.get('LLM_BURST', 5))
+DEADLINE = float(os.environ.get('LLM_DEADLINE', 30))
+MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 2))
+RETRY_RATIO = float(os.environ.get('LLM_RETRY_RATIO', 0.2))
+BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', 5))
+BREAKER_COOLDOWN = float(os.environ.get('LLM_BREAKER_COOLDOWN', 30))
+BACKOFF_BASE = 0.25  # seconds
+BACKOFF_MAX = 4.0  # seconds
+
+# Upstream errors worth retrying, by exception class name so the Google
+# client libraries need not be importable here. Only these classes and their
+# subclasses count; any other ProviderError (an empty answer, missing cached
+# content) is permanent and says nothing about upstream health.
+TRANSIENT_ERRORS = {
+    'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable',
+    'InternalServerError', 'DeadlineExceeded', 'GatewayTimeout',
+    'Aborted', 'TimeoutError', 'ConnectionError', 'TransientProviderError',
+}
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(ProviderError):
+    """Raised without calling upstream while the circuit is open"""
+
+
+class RateLimitedError(ProviderError):
+    """Raised when no request token frees up before the deadline"""
+
+
+class DeadlineExceededError(TransientProviderError):
+    """Raised when a call runs out of time across its attempts"""
+
+
+def is_transient(error):
+    """Return True if an error suggests a retry may succeed"""
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    def acquire(self, deadline):
+        """Take a token, waiting until the monotonic deadline; False on timeout"""
+        waited = False
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens
+                                   + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+                if not waited:
+                    self.throttled += 1
+                    waited = True
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def available(self):
+        with self._lock:
+            elapsed = time.monotonic() - self._updated
+            return min(self.capacity, self._tokens + elapsed * self.rate)
+
+
+class RetryBudget:
+    """Allow retries only up to a fraction of first attempts"""
+
+    def __init__(self, ratio, reserve=3):
+        self.ratio = ratio
+        self.capacity = reserve + 10 * ratio
+        self._balance = float(reserve)
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.denied = 0
+
+    def record_attempt(self):
+        with self._lock:
+            self._balance = min(self.capacity, self._balance + self.ratio)
+
+    def try_spend(self):
+        """Take one retry from the budget; False if it is exhausted"""
+        with self._lock:
+            if self._balance >= 1:
+                self._balance -= 1
+                self.retries += 1
+                return True
+            self.denied += 1
+            return False
+
+    def balance(self):
+        with self._lock:
+            return round(self._balance, 2)
+
+
+class CircuitBreaker:
+    """Open after consecutive failures, probe with one call after cooldown"""
+
+    def __init__(self, failure_threshold, cooldown):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self):
+        """Return True if a call may go upstream now"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._trial_running = False
+            if self.state == HALF_OPEN:
+                if self._trial_running:
+                    self.rejected += 1
+                    return False
+                self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opened += 1
+                    print(f"Model circuit opened after {self._failures} failures")
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+    def record_ignored(self):
+        """Release a half-open trial that ended without an upstream verdict"""
+        with self._lock:
+            self._trial_running = False
+
+
+class ResilientProvider:
+    """Rate-limited, retried, deadline-bound, circuit-broken provider"""
+
+    def __init__(self, provider, rate_limit_rpm=RATE_LIMIT_RPM, burst=BURST,
+                 deadline=DEADLINE, max_retries=MAX_RETRIES,
+                 retry_ratio=RETRY_RATIO, breaker_failures=BREAKER_FAILURES,
+                 breaker_cooldown=BREAKER_COOLDOWN):
+        self.provider = provider
+        self.name = provider.name
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate_limit_rpm / 60.0, burst)
+        self.budget = RetryBudget(retry_ratio)
+        self.breaker = CircuitBreaker(breaker_failures, breaker_cooldown)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+
+    def generate(self, prompt, context=None):
+        """Return the response text, retrying transient failures"""
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            self._before_attempt(attempt, deadline)
+            try:
+                text = self.provider.generate(
+                    prompt, timeout=max(0.1, deadline - time.monotonic()),
+                    context=context)
+            except Exception as e:
+                self._after_failure(e)
+                if not self._should_retry(e, attempt, deadline):
+                    raise self._final_error(e)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return text
+
+    def stream(self, prompt, context=None):
+        """Yield response chunks; retried only until the first chunk arrives"""
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            self._before_attempt(attempt, deadline)
+            started = False
+            try:
+                for chunk in self.provider.stream(
+                        prompt, timeout=max(0.1, deadline - time.monotonic()),
+                        context=context):
+                    if time.monotonic() > deadline:
+                        raise DeadlineExceededError('Model stream exceeded its deadline')
+                    started = True
+                    yield chunk
+            except GeneratorExit:
+                self.breaker.record_ignored()
+                raise
+            except Exception as e:
+                self._after_failure(e)
+                if started or not self._should_retry(e, attempt, deadline):
+                    raise self._final_error(e)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return
+
+    def create_context(self, prefix, ttl):
+        """Cache a prompt prefix upstream; the caller retries failures later"""
+        return self.provider.create_context(prefix, ttl)
+
+    def refresh_context(self, context, ttl):
+        """Extend a cached prompt prefix upstream"""
+        return self.provider.refresh_context(context, ttl)
+
+    def stats(self):
+        """Return limiter, retry budget and breaker state for monitoring"""
+        with self._lock:
+            calls, failures, timeouts = self.calls, self.failures, self.timeouts
+        return {
+            'provider': self.name,
+            'calls': calls,
+            'failures': failures,
+            'timeouts': timeouts,
+            'rate_limit': {
+                'tokens_available': round(self.bucket.available(), 2),
+                'capacity': self.bucket.capacity,
+                'per_minute': self.bucket.rate * 60,
+                'throttled': self.bucket.throttled,
+            },
+            'retry_budget': {
+                'balance': self.budget.balance(),
+                'retries': self.budget.retries,
+                'denied': self.budget.denied,
+            },
+            'circuit': {
+                'state': self.breaker.state,
+                'opened': self.breaker.opened,
+                'rejected': self.breaker.rejected,
+            },
+        }
+
+    def _before_attempt(self, attempt, deadline):
+        if attempt == 0:
+            with self._lock:
+                self.calls += 1
+            self.budget.record_attempt()
+        else:
+            # Full jitter keeps retries from many workers from synchronising
+            backoff = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            if time.monotonic() + backoff >= deadline:
+                raise DeadlineExceededError('No time left to retry model call')
+            time.sleep(backoff)
+        if not self.breaker.allow():
+            raise CircuitOpenError('Model circuit is open; failing fast')
+        if not self.bucket.acquire(deadline):
+            self.breaker.record_ignored()
+            raise RateLimitedError('Model rate limit reached before the deadline')
+
+    def _after_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            if 'Timeout' in type(error).__name__ or 'Deadline' in type(error).__name__:
+                self.timeouts += 1
+        if is_transient(error):
+            self.breaker.record_failure()
+        else:
+            # A bad request says nothing about upstream health
+            self.breaker.record_ignored()
+
+    def _should_retry(self, error, attempt, deadline):
+        return (is_transient(error) and attempt < self.max_retries
+                and time.monotonic() < deadline and self.budget.try_spend())
+
+    def _final_error(self, error):
+        if isinstance(error, ProviderError):
+            return error
+        return ProviderError(f"{type(error).__name__}: {error}")
@@ -0,0 +1,157 @@
+"""Production launcher for maya.py and munal-ai/munal.py.
+
+`python maya.py` runs Flask's single-process development server with the
+debugger and reloader on. This runs the same Flask app under a production
+WSGI server instead:
+
+    python serve.py maya                                  # gunicorn, 1 x 32 threads
+    python serve.py munal --worker-class gevent --connections 500
+    python serve.py maya --server waitress --threads 32
+
+Every option can also be set from the environment (WEB_SERVER, WEB_BIND,
+WEB_WORKERS, WEB_WORKER_CLASS, WEB_THREADS, WEB_CONNECTIONS, WEB_TIMEOUT,
+WEB_GRACEFUL_TIMEOUT, WEB_BUILD_CSS).
+
+Before serving, the purged stylesheet (static/app.css, see build_css.py) is
+built if it is missing or older than the templates' classes. That needs
+internet access once; offline, a failed build is logged and the pages keep
+whatever stylesheet exists, or the CDN links. --no-build-css skips the step.
+
+Servers and worker classes:
+
+- gunicorn `gthread` (default): each worker process serves up to --threads
+  requests at once. Suits the long-polls and SSE streams the pages use
+- gunicorn `gevent`: one greenlet per request, up to --connections per
+  worker; needs `pip install gevent`
+- gunicorn `sync`: one request per worker process at a time; every open
+  stream or long-poll holds a whole process, so only for comparison
+- waitress: a pure-Python threaded server for hosts without gunicorn
+
+On SIGTERM or Ctrl-C the server stops accepting connections and lets
+requests in flight finish: gunicorn waits up to --graceful-timeout seconds,
+waitress a fixed 5 seconds.
+
+Analysis jobs, coalesced flights and the in-memory cache live inside one
+process, so a job polled from another worker is not found. Keep --workers
+at 1 and scale with threads or gevent unless the proxy in front pins each
+client to one worker.
+
+munal.py reads the serial port in-process unless SENSOR_SOCKET points at a
+running sensor_daemon.py, so without it munal is limited to one worker,
+which starts the reader once. With the daemon every worker only subscribes.
+"""
+import argparse
+import importlib
+import os
+import signal
+import sys
+
+import build_css
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# name: (directory, module, default bind address)
+APPS = {
+    'maya': (ROOT, 'maya', '127.0.0.1:5000'),
+    'munal': (os.path.join(ROOT, 'munal-ai'), 'munal', '0.0.0.0:5000'),
+}
+SERVERS = ('gunicorn', 'waitress')
+WORKER_CLASSES = ('gthread', 'gevent', 'sync')
+
+
+def load_app(name):
+    """Import an app module and start the background work it owns"""
+    directory, module_name, _ = APPS[name]
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    module = importlib.import_module(module_name)
+    start_sensor_reader = getattr(module, 'start_sensor_reader', None)
+    if start_sensor_reader is not None:
+        start_sensor_reader()
+    return module.app
+
+
+def run_gunicorn(name, args):
+    """Serve with gunicorn; each worker process imports the app itself"""
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', args.bind)
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('worker_class', args.worker_class)
+            # gunicorn silently swaps sync for gthread when threads > 1
+            threads = 1 if args.worker_class == 'sync' else args.threads
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_connections', args.connections)
+            self.cfg.set('timeout', args.timeout)
+            self.cfg.set('graceful_timeout', args.graceful_timeout)
+
+        def load(self):
+            return load_app(name)
+
+    Application().run()
+
+
+def run_waitress(name, args):
+    """Serve with waitress: one process, a fixed pool of request threads"""
+    from waitress import create_server
+
+    host, _, port = args.bind.rpartition(':')
+    server = create_server(load_app(name), host=host, port=int(port),
+                           threads=args.threads, connection_limit=args.connections)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    # waitress drains its request threads when interrupted; do the same on
+    # SIGTERM from systemd or docker
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Serving {name} with waitress on {args.bind} ({args.threads} threads)")
+    server.run()
+
+
+def main():
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('app', choices=sorted(APPS))
+    parser.add_argument('--server', choices=SERVERS, default=env('WEB_SERVER', 'gunicorn'))
+    parser.add_argument('--bind', default=env('WEB_BIND'),
+                        help='host:port (default: the address the app uses today)')
+    parser.add_argument('--workers', type=int, default=int(env('WEB_WORKERS', 1)),
+                        help='gunicorn worker processes')
+    parser.add_argument('--worker-class', choices=WORKER_CLASSES,
+                        default=env('WEB_WORKER_CLASS', 'gthread'))
+    parser.add_argument('--threads', type=int, default=int(env('WEB_THREADS', 32)),
+                        help='request threads per process (gthread, waitress)')
+    parser.add_argument('--connections', type=int,
+                        default=int(env('WEB_CONNECTIONS', 1000)),
+                        help='open connections per process (gevent, waitress)')
+    parser.add_argument('--timeout', type=int, default=int(env('WEB_TIMEOUT', 120)),
+                        help='seconds before gunicorn restarts a silent worker')
+    parser.add_argument('--graceful-timeout', type=int,
+                        default=int(env('WEB_GRACEFUL_TIMEOUT', 30)),
+                        help='seconds gunicorn lets requests finish on shutdown')
+    parser.add_argument('--no-build-css', dest='build_css', action='store_false',
+                        default=env('WEB_BUILD_CSS', '1') == '1',
+                        help='do not build a missing or stale static/app.css')
+    args = parser.parse_args()
+    args.bind = args.bind or APPS[args.app][2]
+
+    if args.app == 'munal' and args.workers > 1 and not env('SENSOR_SOCKET'):
+        parser.error('munal reads the serial port in-process and must run as '
+                     'one worker; start munal-ai/sensor_daemon.py and set '
+                     'SENSOR_SOCKET, or scale with --threads or --worker-class gevent')
+    if args.workers > 1:
+        print("Warning: jobs and coalesced analyses are per worker process; "
+              "pin clients to a worker or polling /analyze/<job_id> will 404")
+
+    if args.build_css:
+        build_css.ensure()
+    if args.server == 'waitress':
+        run_waitress(args.app, args)
+    else:
+        run_gunicorn(args.app, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Single-flight coalescing of identical in-flight analyses.
+
+When several clients ask for the same analysis at once, only the first
+(the leader) calls the model; the others join its flight and receive the
+same result when it lands. Keys are the analysis cache keys, so once the
+leader has cached its answer later requests are served from the cache and
+the flight is forgotten. The number of upstream calls saved is counted.
+"""
+import threading
+
+
+class Flight:
+    """One upstream call that any number of identical requests can wait on"""
+
+    __slots__ = ('result', 'error', 'done', 'followers')
+
+    def __init__(self):
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+        self.followers = 0
+
+    def wait(self, timeout=None):
+        """Block until the leader lands and return its result or raise its error"""
+        if not self.done.wait(timeout):
+            raise TimeoutError('Timed out waiting for a shared analysis')
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key"""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.saved_calls = 0
+
+    def join(self, key):
+        """Return (flight, is_leader); the leader must call land() when done"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Flight()
+                self.leaders += 1
+                return flight, True
+            flight.followers += 1
+            self.saved_calls += 1
+            return flight, False
+
+    def land(self, key, flight, result=None, error=None):
+        """Publish the leader's outcome to every follower"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result = result
+        flight.error = error
+        flight.done.set()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Call fn once for all concurrent callers with the same key"""
+        flight, leader = self.join(key)
+        if not leader:
+            return flight.wait()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.land(key, flight, error=e)
+            raise
+        self.land(key, flight, result=result)
+        return result
+
+    def stats(self):
+        """Return upstream calls made and saved by coalescing"""
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'upstream_calls': self.leaders,
+                'saved_calls': self.saved_calls,
+            }
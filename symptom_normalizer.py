@@ -0,0 +1,323 @@
+"""Map free-text symptoms onto canonical symptom IDs.
+
+"Headache", "headache ", "head ache", "headahce" and "my head hurts" are
+one symptom, but raw strings make them five cache keys, five coalesced
+flights and five prompts. Every entry point runs symptoms through
+`SymptomNormalizer` first, so all of them reduce to the ID `headache`.
+
+The vocabulary is `triage_conditions.json`: every symptom a condition
+lists, every red flag and every lay-language alias. A symptom's ID is its
+canonical phrase, lowercase with single spaces, so IDs read well in
+prompts and match the triage index's terms.
+
+Text is split into words and clause punctuation.
+Each word is mapped to a vocabulary word, in this order: exact match,
+plural, two words run together ("head ache"), then spelling correction.
+Only words that are not real words are corrected: anything in
+`english_words.txt` (common English, see build_wordlist.py) or in the
+vocabulary's `not_typos` (real words too rare for that list) is left
+alone, so "infrequent", "tiered" and "contusion" stay themselves. A
+correction may not just drop a negating prefix ("unproductive" is never
+"productive"). Corrections use a precomputed index of single-letter
+deletions (SymSpell) rather than a scan of the vocabulary. Words of four
+or five letters only accept a swap of two adjacent letters. Longer words
+accept one edit, and words of ten or more letters accept two. The
+resulting word sequence runs through an Aho-Corasick automaton over all
+vocabulary phrases in one pass, taking the leftmost, longest match.
+
+A symptom within three words after "no", "not", "without" and similar
+cues is negated, and so is one joined to a negated symptom by "or" or
+"and" ("no fever or chills"). "but" and sentence ends close the scope.
+An entry fully explained by symptoms and filler words collapses to its
+IDs; anything else is also kept as cleaned free text. So is any entry
+that needed a spelling correction, since the guess may be wrong: the
+model and the cache key still see what was typed.
+"""
+import json
+import os
+import re
+from collections import namedtuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SOURCE = os.path.join(ROOT, 'triage_conditions.json')
+WORDS_PATH = os.path.join(ROOT, 'english_words.txt')
+
+TOKEN = re.compile(r'[a-z0-9]+|[.;!?,]')
+BREAKS = frozenset('.;!?')  # a comma only stops a negation carrying over
+NEGATIONS = frozenset(('no', 'not', 'without', 'never', 'denies', 'deny',
+                       'dont', 'doesnt', 'didnt', 'havent', 'hasnt', 'isnt',
+                       'arent', 'wasnt', 'none', 'nor', 'free', 'negative'))
+NEGATION_WINDOW = 3  # words before a symptom that can negate it
+NEGATION_JOINS = frozenset(('or', 'and', 'nor'))
+CLAUSE_BREAKS = frozenset(('but', 'however', 'although', 'though', 'except',
+                           'yet'))
+# Words an entry may contain besides symptoms and still collapse to IDs
+FILLER = frozenset(('a', 'an', 'the', 'and', 'or', 'i', 'im', 'ive', 'have',
+                    'has', 'had', 'having', 'my', 'me', 'of', 'with', 'some',
+                    'also', 'feel', 'feels', 'am', 'is', 'are', 'been', 'got',
+                    'getting', 'bit', 'little', 'lot', 'really', 'bad',
+                    'since', 'today', 'yesterday', 'lately', 'recently'))
+SIBILANTS = ('s', 'x', 'z', 'ch', 'sh')  # endings that pluralise with -es
+MIN_SWAP_LENGTH = 4  # shorter words are never corrected
+MIN_EDIT_LENGTH = 6  # shorter words only accept swapped letters
+MIN_DOUBLE_EDIT_LENGTH = 10
+# A correction that only removes one of these turns a word into its opposite
+NEGATING_PREFIXES = frozenset(('a', 'an', 'dis', 'il', 'im', 'in', 'ir',
+                               'non', 'un'))
+MAX_CORRECTIONS = 10000  # cached spelling corrections
+
+_Normalized = namedtuple('_Normalized', 'present negated free_text unmatched')
+
+
+def tokenize(text):
+    """Split text into lowercase words and clause punctuation"""
+    return TOKEN.findall(str(text).lower().replace("'", '').replace('’', ''))
+
+
+def phrase(text):
+    """Return the canonical spelling of a symptom phrase"""
+    return ' '.join(t for t in tokenize(text) if t.isalnum())
+
+
+def clean(text):
+    """Collapse whitespace and case-fold an entry kept as free text"""
+    return ' '.join(str(text).split()).casefold()
+
+
+def load_words(path=WORDS_PATH):
+    """Read a word list, one word per line; empty if it is missing"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return frozenset(line.strip() for line in f
+                             if line.strip() and not line.startswith('#'))
+    except OSError as e:
+        print(f"English word list unavailable ({e}); real words may be "
+              f"spelling-corrected")
+        return frozenset()
+
+
+def deletes(word, depth):
+    """Return every string reachable from word by deleting up to depth letters"""
+    found, frontier = set(), {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+def edit_distance(a, b):
+    """Optimal string alignment distance: edits with adjacent swaps"""
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous = previous, current
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[-1]
+
+
+class Normalized(_Normalized):
+    """Symptoms found in a request: canonical IDs plus leftover free text"""
+
+    __slots__ = ()
+
+    def terms(self):
+        """Return the sorted form used for prompts and cache keys"""
+        # Negated symptoms read "no <id>"
+        terms = list(self.present) + [f"no {term}" for term in self.negated]
+        return sorted(set(terms + list(self.free_text)))
+
+
+class SymptomNormalizer:
+    """Canonicalise symptom entries against a fixed vocabulary"""
+
+    def __init__(self, vocabulary, real_words=()):
+        # vocabulary maps each phrase (canonical or alias) to its ID
+        words = {}
+        for text in vocabulary:
+            for word in text.split():
+                words.setdefault(word, len(words))
+        self._words = words
+        self._real_words = frozenset(real_words)  # never corrected
+        self._corrections = {}
+
+        # SymSpell index: deletions of each word that may be corrected
+        self._deletes = {}
+        for word in words:
+            # One letter shorter, so a 6-letter typo can reach "fever"
+            if len(word) >= MIN_EDIT_LENGTH - 1:
+                depth = 2 if len(word) >= MIN_DOUBLE_EDIT_LENGTH else 1
+                for variant in deletes(word, depth) | {word}:
+                    self._deletes.setdefault(variant, []).append(word)
+
+        # Aho-Corasick automaton over word IDs
+        self._goto = [{}]
+        self._output = [None]  # longest (length, ID) ending in each state
+        for text, canonical in vocabulary.items():
+            state = 0
+            for word in text.split():
+                word_id = words[word]
+                if word_id not in self._goto[state]:
+                    self._goto.append({})
+                    self._output.append(None)
+                    self._goto[state][word_id] = len(self._goto) - 1
+                state = self._goto[state][word_id]
+            self._output[state] = (len(text.split()), canonical)
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:  # breadth first; the list grows as it is walked
+            for word_id, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and word_id not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(word_id, 0)
+                self._fail[child] = target if target != child else 0
+                if self._output[child] is None:
+                    self._output[child] = self._output[self._fail[child]]
+                queue.append(child)
+
+    @classmethod
+    def from_file(cls, path=SOURCE, words_path=WORDS_PATH):
+        """Build a normaliser from the triage condition list and word list"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        vocabulary = {}
+        for condition in data['conditions']:
+            for term in condition['symptoms']:
+                vocabulary[phrase(term)] = phrase(term)
+        for term in data['red_flags']:
+            vocabulary[phrase(term)] = phrase(term)
+        for alias, canonical in data['aliases'].items():
+            vocabulary.setdefault(phrase(alias), phrase(canonical))
+        real_words = load_words(words_path) | frozenset(data.get('not_typos', ()))
+        return cls(vocabulary, real_words)
+
+    def correct(self, word):
+        """Return the vocabulary word a misspelling stands for, or None"""
+        if word in self._corrections:
+            return self._corrections[word]
+        match = None
+        if len(word) >= MIN_SWAP_LENGTH and word not in self._real_words \
+                and not word.isdigit():
+            if len(word) >= MIN_EDIT_LENGTH:
+                limit = 2 if len(word) >= MIN_DOUBLE_EDIT_LENGTH else 1
+                candidates = set()
+                for variant in deletes(word, limit) | {word}:
+                    candidates.update(self._deletes.get(variant, ()))
+                ranked = sorted((edit_distance(word, c), c) for c in candidates
+                                if not (word.endswith(c) and
+                                        word[:-len(c)] in NEGATING_PREFIXES))
+                if ranked and ranked[0][0] <= limit:
+                    match = ranked[0][1]
+            else:
+                for i in range(len(word) - 1):
+                    swapped = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+                    if swapped in self._words:
+                        match = swapped
+                        break
+        if len(self._corrections) >= MAX_CORRECTIONS:
+            self._corrections.clear()
+        self._corrections[word] = match
+        return match
+
+    def _word_ids(self, tokens):
+        """Map tokens to vocabulary word IDs; -1 for anything else"""
+        words = self._words
+        ids, spans = [], []  # spans: the token range each ID covers
+        corrected = []  # whether each ID came from a spelling correction
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            joined = token + tokens[i + 1] if i + 1 < len(tokens) else ''
+            if joined in words:
+                ids.append(words[joined])
+                spans.append((i, i + 2))
+                corrected.append(False)
+                i += 2
+                continue
+            spelling = None
+            if token in words:
+                word_id = words[token]
+            elif token.endswith('s') and token[:-1] in words:
+                word_id = words[token[:-1]]
+            elif (token.endswith('es') and token[:-2] in words
+                    and token[:-2].endswith(SIBILANTS)):
+                word_id = words[token[:-2]]
+            else:
+                spelling = self.correct(token)
+                word_id = words[spelling] if spelling else -1
+            ids.append(word_id)
+            spans.append((i, i + 1))
+            corrected.append(spelling is not None)
+            i += 1
+        return ids, spans, corrected
+
+    def find(self, text):
+        """Return (ID, negated, start, end, corrected) for each symptom in text"""
+        tokens = tokenize(text)
+        ids, spans, corrected = self._word_ids(tokens)
+
+        candidates = []
+        state = 0
+        for position, word_id in enumerate(ids):
+            while state and word_id not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(word_id, 0)
+            if self._output[state] is not None:
+                length, canonical = self._output[state]
+                candidates.append((position + 1 - length, position + 1, canonical))
+        candidates.sort(key=lambda c: (c[0], -c[1]))
+
+        found = []
+        previous_end = previous_last = scope_start = 0
+        for start, end, canonical in candidates:
+            if start < previous_end:
+                continue  # overlaps a longer, earlier match
+            first, last = spans[start][0], spans[end - 1][1]
+            between = tokens[previous_last:first]
+            for k, token in enumerate(between):
+                if token in BREAKS or token in CLAUSE_BREAKS:
+                    scope_start = previous_last + k + 1
+            window = tokens[max(scope_start, first - NEGATION_WINDOW):first]
+            negated = any(word in NEGATIONS for word in window) or (
+                bool(found) and found[-1][1]
+                and all(word in NEGATION_JOINS for word in between))
+            found.append((canonical, negated, first, last,
+                          any(corrected[start:end])))
+            previous_end, previous_last, scope_start = end, last, last
+        return found
+
+    def normalize(self, entries):
+        """Normalise a list of symptom entries"""
+        present, negated, free_text, unmatched = set(), set(), [], []
+        for entry in entries:
+            tokens = tokenize(entry)
+            if not tokens:
+                continue
+            found = self.find(entry)
+            covered = [False] * len(tokens)
+            guessed = False
+            for canonical, is_negated, first, last, was_corrected in found:
+                (negated if is_negated else present).add(canonical)
+                covered[first:last] = [True] * (last - first)
+                guessed |= was_corrected
+            if not found:
+                unmatched.append(clean(entry))
+            if guessed or not all(c or t in FILLER or t in NEGATIONS or not t.isalnum()
+                                  for c, t in zip(covered, tokens)):
+                free_text.append(clean(entry))
+        return Normalized(tuple(sorted(present)), tuple(sorted(negated - present)),
+                          tuple(sorted(set(free_text))), tuple(unmatched))
+
+
+def load_symptom_normalizer(path=SOURCE):
+    """Return a normaliser; without a vocabulary it only cleans text"""
+    try:
+        return SymptomNormalizer.from_file(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Symptom vocabulary unavailable ({e}); symptoms are only cleaned")
+        return SymptomNormalizer({})
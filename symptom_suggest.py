@@ -0,0 +1,180 @@
+"""Typeahead suggestions for the symptom input.
+
+`/symptoms/suggest?q=` completes what the user has typed so far from the
+symptom vocabulary in `triage_conditions.json`, the same one the
+normaliser maps entries onto. Suggestions are canonical IDs, so a picked
+suggestion normalises to itself.
+
+The index is a sorted array of keys searched with bisect. A phrase
+gets one key per word it contains, running from that word to the end, so
+"thr" finds "sore throat" as well as "throat hurts". Aliases are indexed
+too and suggest their canonical symptom. Matches at the start of a phrase
+rank first, then popularity, then shorter terms.
+
+Popularity starts from how strongly the conditions list each symptom and
+grows with every symptom analysed. New counts are folded in at most once
+per POPULARITY_REFRESH; each fold clears the cache of encoded responses.
+Between folds a repeated query is a dictionary lookup. With
+SYMPTOM_POPULARITY_PATH set, counts are saved at each fold and reloaded at
+startup.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from symptom_normalizer import SOURCE, phrase
+
+MAX_SUGGESTIONS = 8
+MAX_QUERY_LENGTH = 64
+POPULARITY_REFRESH = 60  # seconds between re-rankings
+MAX_CACHED_QUERIES = 4096
+# Browsers may reuse a response until the ranking can next change
+SUGGEST_CACHE_CONTROL = f'public, max-age={POPULARITY_REFRESH}'
+
+
+class SymptomSuggester:
+    """Prefix index over symptom phrases, ranked by popularity"""
+
+    def __init__(self, vocabulary, seed=None, path=None):
+        # vocabulary maps each phrase (canonical or alias) to its ID
+        keys = []
+        for text, canonical in vocabulary.items():
+            words = text.split()
+            for position in range(len(words)):
+                keys.append((' '.join(words[position:]), position > 0,
+                             canonical, text))
+        keys.sort()
+        self._keys = [key[0] for key in keys]
+        self._entries = [key[1:] for key in keys]
+        self.path = path
+        self.learned = Counter()  # counts from past requests; what is saved
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.learned.update(json.load(f))
+        self.popularity = Counter(seed or {}) + self.learned
+        self._pending = Counter()
+        self._folded_at = time.monotonic()
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_file(cls, source=SOURCE, path=None):
+        """Index the triage vocabulary, seeded by symptom weights"""
+        with open(source, encoding='utf-8') as f:
+            data = json.load(f)
+        vocabulary, seed = {}, Counter()
+        for condition in data['conditions']:
+            for term, weight in condition['symptoms'].items():
+                vocabulary[phrase(term)] = phrase(term)
+                seed[phrase(term)] += weight
+        for term in data['red_flags']:
+            vocabulary[phrase(term)] = phrase(term)
+        for alias, canonical in data['aliases'].items():
+            vocabulary.setdefault(phrase(alias), phrase(canonical))
+        return cls(vocabulary, seed, path)
+
+    def record(self, symptoms):
+        """Count canonical symptoms someone asked to have analysed"""
+        with self._lock:
+            self._pending.update(symptoms)
+
+    def suggest(self, query, limit=MAX_SUGGESTIONS):
+        """Return up to limit suggestions for a partly typed symptom"""
+        if not str(query).strip():
+            return [{'symptom': term}
+                    for term, _ in self.popularity.most_common(limit)]
+        # Punctuation is dropped as in phrase(); a trailing space is kept
+        # so that "sore " only completes to phrases with another word
+        prefix = phrase(query)
+        if not prefix:
+            return []
+        if str(query).endswith(' '):
+            prefix += ' '
+        best = {}
+        i = bisect.bisect_left(self._keys, prefix)
+        while i < len(self._keys) and self._keys[i].startswith(prefix):
+            inside, canonical, text = self._entries[i]
+            rank = (inside, text != canonical)
+            if canonical not in best or rank < best[canonical][0]:
+                best[canonical] = (rank, text)
+            i += 1
+        ranked = sorted(best.items(), key=lambda item: (
+            item[1][0][0], -self.popularity[item[0]], len(item[0]), item[0]))
+        suggestions = []
+        for canonical, (_, text) in ranked[:limit]:
+            suggestion = {'symptom': canonical}
+            if text != canonical:
+                suggestion['matched'] = text
+            suggestions.append(suggestion)
+        return suggestions
+
+    def encoded(self, query):
+        """Return the JSON response body for a query, cached until re-ranked"""
+        query = str(query)[:MAX_QUERY_LENGTH]
+        key = ' '.join(query.lower().split())
+        if key and query[-1].isspace():
+            key += ' '  # "sore " and "sore" suggest different things
+        self._maybe_fold()
+        body = self._cache.get(key)
+        if body is not None:
+            self.hits += 1
+            return body
+        self.misses += 1
+        body = json.dumps({'query': key, 'suggestions': self.suggest(key)},
+                          separators=(',', ':')).encode('utf-8')
+        with self._lock:
+            if len(self._cache) >= MAX_CACHED_QUERIES:
+                self._cache.clear()
+            self._cache[key] = body
+        return body
+
+    def stats(self):
+        """Return index size and response cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            'keys': len(self._keys),
+            'symptoms': len(set(entry[1] for entry in self._entries)),
+            'cached_queries': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'pending_counts': sum(self._pending.values()),
+        }
+
+    def _maybe_fold(self):
+        """Fold pending counts into the ranking once the refresh is due"""
+        now = time.monotonic()
+        if not self._pending or now - self._folded_at < POPULARITY_REFRESH:
+            return
+        with self._lock:
+            if not self._pending:
+                return
+            self.learned.update(self._pending)
+            self.popularity.update(self._pending)
+            self._pending.clear()
+            self._folded_at = now
+            self._cache.clear()
+            snapshot = dict(self.learned)
+        if self.path:
+            try:
+                temporary = f"{self.path}.tmp"
+                with open(temporary, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f)
+                os.replace(temporary, self.path)
+            except OSError as e:
+                print(f"Could not save symptom popularity: {e}")
+
+
+def load_symptom_suggester():
+    """Return the suggester, or None if the vocabulary cannot be read"""
+    try:
+        return SymptomSuggester.from_file(
+            path=os.environ.get('SYMPTOM_POPULARITY_PATH'))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Symptom suggestions unavailable ({e})")
+        return None
@@ -0,0 +1,37 @@
+"""Tests for the compiled analysis schemas.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_schema import (ANALYSIS_SCHEMA, BASIC_ANALYSIS_SCHEMA,  # noqa: E402
+                             DEFAULT_DISEASES, SchemaError, compile_schema)
+
+SCHEMAS = [compile_schema(ANALYSIS_SCHEMA), compile_schema(BASIC_ANALYSIS_SCHEMA)]
+
+
+@pytest.mark.parametrize('validate', SCHEMAS)
+@pytest.mark.parametrize('analysis', [
+    {}, [], 'Flu', {'diseases': []}, {'diseases': ['Flu']},
+    {'diseases': 'Flu', 'treatments': ['Rest']}, {'diseases': [None, 3]},
+])
+def test_answer_without_usable_diseases_is_rejected(validate, analysis):
+    with pytest.raises(SchemaError):
+        validate(analysis)
+
+
+@pytest.mark.parametrize('validate', SCHEMAS)
+def test_usable_disease_is_kept_and_bad_ones_dropped(validate):
+    result = validate({'diseases': ['Flu', {'name': 'Flu', 'confidence': '85%'}]})
+    assert [(d['name'], d['confidence']) for d in result['diseases']] == [('Flu', 85)]
+
+
+def test_fallback_is_built_from_default_diseases():
+    fallback = compile_schema(ANALYSIS_SCHEMA)({'diseases': DEFAULT_DISEASES})
+    assert fallback['diseases'] == DEFAULT_DISEASES
+    assert fallback['seek_medical_attention'] is True
@@ -0,0 +1,86 @@
+"""Tests for context_cache.ContextCache losing its upstream context.
+
+    python -m pytest tests
+"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_cache import ContextCache  # noqa: E402
+from llm_provider import ContextNotFound, MockProvider  # noqa: E402
+from prompt_templates import PromptTemplate  # noqa: E402
+from resilience import CLOSED, ResilientProvider  # noqa: E402
+
+PREFIX = 'You are a careful medical assistant. ' * 20
+TEMPLATE = PromptTemplate(PREFIX, 'Patient: {name}')
+
+
+def setup(**kwargs):
+    mock = MockProvider(latency=0)
+    llm = ResilientProvider(mock, rate_limit_rpm=60000, burst=100,
+                            breaker_failures=2)
+    kwargs.setdefault('enabled', True)
+    cache = ContextCache(llm, PREFIX, **kwargs)
+    return mock, llm, cache
+
+
+def wait_for_context(cache, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        context = cache.context()
+        if context is not None:
+            return context
+        time.sleep(0.01)
+    raise AssertionError('context was never created')
+
+
+def prompt(name='Ann'):
+    return TEMPLATE.render(name=name)
+
+
+@pytest.mark.parametrize('call', ['generate', 'stream'])
+def test_lost_context_is_dropped_and_the_prompt_resent_whole(call):
+    mock, llm, cache = setup()
+    first = wait_for_context(cache)
+    expected = mock.response_for(prompt().text)
+    mock.drop_contexts()
+    sent = []
+
+    for name in ('Ann',) * 4:
+        result = getattr(cache, call)(prompt(name),
+                                      on_send=lambda p, cached: sent.append(cached))
+        assert ''.join(result) == expected
+
+    assert cache.stats()['lost'] == 1
+    assert sent[:2] == [True, False]
+    assert llm.breaker.state == CLOSED
+    assert wait_for_context(cache).name != first.name
+
+
+def test_not_found_without_context_is_raised():
+    mock, llm, cache = setup(enabled=False)
+
+    def missing(prompt, timeout=None, context=None):
+        raise ContextNotFound('gone')
+    mock.generate = missing
+    with pytest.raises(ContextNotFound):
+        cache.generate(prompt())
+
+
+def test_failed_refresh_drops_the_context():
+    mock, llm, cache = setup(ttl=400, refresh_margin=150)
+    wait_for_context(cache)
+    mock.drop_contexts()
+    # Within the refresh margin: this call starts a refresh that fails
+    cache._context = cache._context._replace(expires_at=time.monotonic() + 100)
+    cache.context()
+    deadline = time.monotonic() + 2
+    while cache.stats()['failures'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.stats()['failures'] == 1
+    assert cache.stats()['name'] is None
+    assert cache.generate(prompt()) == mock.response_for(prompt().text)
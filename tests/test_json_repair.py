@@ -0,0 +1,107 @@
+"""Exhaustive and fuzz tests for json_repair.extract_json.
+
+    python -m pytest tests
+"""
+import json
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_repair import extract_json  # noqa: E402
+from llm_provider import MockProvider  # noqa: E402
+
+RANDOM_CASES = 5000
+CORRUPTION = '{}[]",:\\ \n0aT'
+
+
+def sample_analyses(count=5):
+    mock = MockProvider(latency=0)
+    analyses = []
+    for i in range(count):
+        analysis = json.loads(mock.response_for(f"patient {i}"))
+        analysis['diseases'][0]['description'] += ' Quoted "term", braces {x} and [y].'
+        analyses.append(analysis)
+    return analyses
+
+
+ANALYSES = sample_analyses()
+
+
+def is_subset(partial, full):
+    if isinstance(partial, dict):
+        return isinstance(full, dict) and all(
+            k in full and is_subset(v, full[k]) for k, v in partial.items())
+    if isinstance(partial, list):
+        return isinstance(full, list) and len(partial) <= len(full) and all(
+            is_subset(p, f) for p, f in zip(partial, full))
+    return partial == full
+
+
+@pytest.mark.parametrize('analysis', ANALYSES)
+def test_wrapped_answers_are_intact(analysis):
+    text = json.dumps(analysis, indent=2)
+    for wrapped in (text, f"```json\n{text}\n```", f"```json\n{text}",
+                    f"Here is the {{requested}} analysis:\n{text}\nDone {{ok}}."):
+        assert extract_json(wrapped) == (analysis, True)
+
+
+@pytest.mark.parametrize('analysis', ANALYSES)
+def test_repaired_answers_are_equal_but_not_intact(analysis):
+    text = json.dumps(analysis, indent=2)
+    for damaged in (text.replace('\n  ]', ',\n  ]'),
+                    text.replace('true', 'True').replace('false', 'False')):
+        assert extract_json(damaged) == (analysis, False)
+
+
+@pytest.mark.parametrize('analysis', ANALYSES)
+def test_every_truncation_is_a_subset_or_rejected(analysis):
+    text = json.dumps(analysis, indent=2)
+    recovered = 0
+    for cut in range(1, len(text)):
+        try:
+            value, intact = extract_json(text[:cut])
+        except ValueError:
+            continue
+        assert value, cut
+        assert not intact, cut
+        assert is_subset(value, analysis), cut
+        recovered += 1
+    assert recovered > len(text) // 2
+    assert extract_json(text) == (analysis, True)
+
+
+@pytest.mark.parametrize('text', ['', '{', '{}', '[]', 'no json here',
+                                  '{"diseases": [{"name": "Migr'])
+def test_nothing_usable_raises(text):
+    with pytest.raises(ValueError):
+        extract_json(text)
+
+
+def test_empty_array_is_rejected_for_batches():
+    with pytest.raises(ValueError):
+        extract_json('[]', container='[')
+    assert extract_json('[{"a": 1}]', container='[') == ([{'a': 1}], True)
+
+
+def test_random_corruption_only_raises_value_error():
+    rng = random.Random(0)
+    for _ in range(RANDOM_CASES):
+        text = json.dumps(rng.choice(ANALYSES))
+        pos = rng.randrange(len(text))
+        op = rng.randrange(3)
+        if op == 0:
+            text = text[:pos] + text[pos + 1:]
+        elif op == 1:
+            text = text[:pos] + rng.choice(CORRUPTION) + text[pos:]
+        else:
+            text = text[:pos] + rng.choice(CORRUPTION) + text[pos + 1:]
+        try:
+            value, intact = extract_json(text)
+        except ValueError:
+            continue
+        assert value, text
+        assert isinstance(intact, bool)
@@ -0,0 +1,71 @@
+"""Tests for json_stream.AnalysisStreamParser.
+
+    python -m pytest tests
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import AnalysisStreamParser  # noqa: E402
+
+ANALYSIS = {
+    'diseases': [{'name': 'Migraine', 'probability': 60},
+                 {'name': 'Tension headache', 'probability': 30}],
+    'treatments': [],
+    'urgent': False,
+    'note': 'Quoted "term", braces {x} and [y].',
+}
+TEXT = json.dumps(ANALYSIS, indent=2)
+
+
+def stream(text, size=7):
+    parser = AnalysisStreamParser()
+    events = []
+    for i in range(0, len(text), size):
+        events += parser.feed(text[i:i + size])
+    return parser, events
+
+
+@pytest.mark.parametrize('size', [1, 7, 4096])
+@pytest.mark.parametrize('text', [TEXT, f"```json\n{TEXT}\n```",
+                                  f"Here is the analysis:\n{TEXT}\nDone."])
+def test_clean_answer_is_intact(text, size):
+    parser, events = stream(text, size)
+    assert parser.result() == ANALYSIS
+    assert parser.intact
+    assert events[:2] == [('diseases', d) for d in ANALYSIS['diseases']]
+
+
+def test_malformed_item_is_dropped_and_not_intact():
+    damaged = TEXT.replace('"name": "Tension headache"', '"name": Tension headache, :')
+    assert damaged != TEXT
+    parser, events = stream(damaged)
+    assert parser.complete
+    assert parser.result()['diseases'] == ANALYSIS['diseases'][:1]
+    assert [e for e in events if e[0] == 'diseases'] == [('diseases', ANALYSIS['diseases'][0])]
+    assert not parser.intact
+
+
+@pytest.mark.parametrize('damaged', [
+    TEXT.replace('false', 'False'),
+    TEXT.replace('"probability": 30\n    }', '"probability": 30\n    },'),
+    TEXT.replace('"urgent": false', '"urgent": false,'),
+    TEXT.replace('"urgent": false', '"urgent": '),
+    TEXT.replace('    },\n', '    },,\n'),
+])
+def test_repaired_answer_is_not_intact(damaged):
+    assert damaged != TEXT
+    parser, _ = stream(damaged)
+    assert parser.complete
+    assert parser.repaired
+    assert not parser.intact
+
+
+def test_truncated_answer_is_not_intact():
+    parser, _ = stream(TEXT[:-1])
+    assert not parser.complete
+    assert not parser.intact
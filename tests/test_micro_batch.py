@@ -0,0 +1,61 @@
+"""Tests for munal-ai/micro_batch.MicroBatcher failure handling.
+
+    python -m pytest tests
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'munal-ai'))
+
+from micro_batch import MicroBatcher  # noqa: E402
+
+
+def submit_all(batcher, items):
+    outcomes = [None] * len(items)
+
+    def submit(i):
+        try:
+            outcomes[i] = batcher.submit(items[i])
+        except Exception as e:
+            outcomes[i] = e
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(items))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_failed_batch_call_fails_every_item():
+    calls = []
+
+    def run_batch(items):
+        calls.append(items)
+        raise RuntimeError('upstream down')
+    batcher = MicroBatcher(run_batch, max_batch=4, max_wait=0.5)
+    outcomes = submit_all(batcher, ['a', 'b', 'c', 'd'])
+    assert len(calls) == 1
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    assert batcher.stats()['failed'] == 4
+    assert batcher.stats()['fallbacks'] == 0
+
+
+def test_missing_entries_fall_back_alone():
+    def run_batch(items):
+        return [None if item == 'b' else item.upper() for item in items]
+    batcher = MicroBatcher(run_batch, max_batch=3, max_wait=0.5)
+    assert submit_all(batcher, ['a', 'b', 'c']) == ['A', None, 'C']
+    assert batcher.stats()['fallbacks'] == 1
+    assert batcher.stats()['failed'] == 0
+
+
+@pytest.mark.parametrize('results', [[], ['A']])
+def test_short_result_list_falls_back(results):
+    batcher = MicroBatcher(lambda items: results, max_batch=2, max_wait=0.5)
+    outcomes = submit_all(batcher, ['a', 'b'])
+    assert outcomes[1] is None
+    assert batcher.stats()['fallbacks'] == 2 - len(results)
@@ -0,0 +1,61 @@
+"""Tests for which failures resilience.ResilientProvider retries and counts.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_provider import (ProviderError, ProviderTimeout,  # noqa: E402
+                          TransientProviderError)
+from resilience import CLOSED, OPEN, ResilientProvider, is_transient  # noqa: E402
+
+
+class FailingProvider:
+    """Raises the given error on every call"""
+
+    name = 'failing'
+
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def generate(self, prompt, timeout=None, context=None):
+        self.calls += 1
+        raise self.error
+
+
+def resilient(provider):
+    return ResilientProvider(provider, rate_limit_rpm=60000, burst=100,
+                             deadline=5, max_retries=2, retry_ratio=10,
+                             breaker_failures=3, breaker_cooldown=60)
+
+
+@pytest.mark.parametrize('error', [
+    TransientProviderError('Injected mock failure'), ProviderTimeout('slow'),
+    TimeoutError(), ConnectionResetError()])
+def test_transient_errors_are_retried_and_open_the_circuit(error, monkeypatch):
+    monkeypatch.setattr('resilience.BACKOFF_BASE', 0)
+    provider = FailingProvider(error)
+    llm = resilient(provider)
+    assert is_transient(error)
+    with pytest.raises(ProviderError):
+        llm.generate('prompt')
+    assert provider.calls == 3
+    assert llm.breaker.state == OPEN
+
+
+@pytest.mark.parametrize('error', [
+    ProviderError('Empty response from model'), ValueError('bad request')])
+def test_permanent_errors_are_not_retried_or_counted(error):
+    provider = FailingProvider(error)
+    llm = resilient(provider)
+    assert not is_transient(error)
+    for _ in range(5):
+        with pytest.raises(ProviderError):
+            llm.generate('prompt')
+    assert provider.calls == 5
+    assert llm.breaker.state == CLOSED
@@ -0,0 +1,75 @@
+"""Tests for building and serving the purged stylesheet (build_css.py).
+
+    python -m pytest tests
+
+CI runs `python build_css.py` first, so the built static/app.css is checked
+too; without it that test is skipped.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import build_css  # noqa: E402
+
+LIBRARY = ('/*! library v1 */.bg-white{color:#fff}.never-used-class{color:red}'
+           '.animate__fadeIn{animation-name:fadeIn}'
+           '@keyframes fadeIn{from{opacity:0}to{opacity:1}}'
+           '@keyframes unused{from{opacity:0}}')
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'library.css'
+    path.write_text(LIBRARY, encoding='utf-8')
+    return str(path)
+
+
+def test_ensure_builds_once_for_the_current_templates(tmp_path, source):
+    output = str(tmp_path / 'static' / 'app.css')
+    assert not build_css.is_current(output)
+    assert build_css.ensure(output, [source])
+    css = open(output, encoding='utf-8').read()
+    assert '.bg-white{' in css and 'never-used-class' not in css
+    assert '@keyframes fadeIn' in css and 'unused' not in css
+    assert build_css.is_current(output)
+
+    built = os.stat(output).st_mtime_ns
+    assert build_css.ensure(output, [str(tmp_path / 'gone.css')])
+    assert os.stat(output).st_mtime_ns == built
+
+
+def test_changed_templates_make_the_stylesheet_stale(tmp_path, source):
+    output = str(tmp_path / 'app.css')
+    build_css.ensure(output, [source])
+    assert not build_css.is_current(output, build_css.template_tokens() | {'new-class'})
+
+
+def test_failed_build_keeps_what_exists(tmp_path):
+    output = str(tmp_path / 'app.css')
+    assert not build_css.ensure(output, [str(tmp_path / 'missing.css')])
+    assert not os.path.exists(output)
+
+
+def test_built_stylesheet_is_served(tmp_path, source):
+    flask = pytest.importorskip('flask')
+    from precompiled_page import ASSET_CACHE_CONTROL, load_stylesheet
+
+    output = str(tmp_path / 'app.css')
+    build_css.ensure(output, [source])
+    stylesheet = load_stylesheet(output)
+    app = flask.Flask(__name__)
+    with app.test_request_context(headers={'Accept-Encoding': 'identity'}):
+        response = stylesheet.response(flask.request)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/css'
+    assert response.headers['Cache-Control'] == ASSET_CACHE_CONTROL
+    assert response.get_data(as_text=True) == open(output, encoding='utf-8').read()
+
+
+def test_repository_stylesheet_is_current():
+    if not os.path.exists(build_css.OUTPUT):
+        pytest.skip('static/app.css not built; run python build_css.py')
+    assert build_css.is_current(), 'templates changed; run python build_css.py'
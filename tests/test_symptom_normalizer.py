@@ -0,0 +1,60 @@
+"""Tests for symptom_normalizer spelling correction.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from symptom_normalizer import SymptomNormalizer, load_words  # noqa: E402
+
+NORMALIZER = SymptomNormalizer.from_file()
+
+
+@pytest.mark.parametrize('word', [
+    'infrequent', 'indignation', 'troubled', 'tiered', 'looser', 'peering',
+    'bitchy', 'contusion', 'shimmering', 'concussions', 'lighthearted',
+    'mingling', 'rumination', 'confection', 'projective'])
+def test_real_words_are_never_corrected(word):
+    assert NORMALIZER.correct(word) is None
+
+
+@pytest.mark.parametrize('typo, word', [
+    ('headahce', 'headache'), ('diarhea', 'diarrhea'), ('nausia', 'nausea'),
+    ('coughign', 'coughing'), ('dizzyness', 'dizziness'), ('fveer', 'fever')])
+def test_misspellings_are_corrected(typo, word):
+    assert NORMALIZER.correct(typo) == word
+
+
+@pytest.mark.parametrize('word', ['unproductive', 'nonproductive', 'unswollen',
+                                  'disfigured'])
+def test_negating_prefix_is_never_dropped(word):
+    # Not in the word list either, so only the prefix rule protects them
+    normalizer = SymptomNormalizer({'productive cough': 'productive cough',
+                                   'swollen': 'swollen', 'figured': 'figured'})
+    assert normalizer.correct(word) is None
+
+
+def test_infrequent_urination_is_not_frequent_urination():
+    result = NORMALIZER.normalize(['infrequent urination'])
+    assert 'frequent urination' not in result.present
+    assert result.terms() == ['infrequent urination']
+
+
+def test_corrected_entry_keeps_the_text_as_typed():
+    result = NORMALIZER.normalize(['headahce'])
+    assert result.terms() == ['headache', 'headahce']
+
+
+def test_plurals_and_inflection_aliases_match():
+    result = NORMALIZER.normalize(['rashes', 'difficult breathing', 'sweaty'])
+    assert result.present == ('difficulty breathing', 'rash', 'sweating')
+    assert result.free_text == ()
+
+
+def test_missing_word_list_only_disables_the_real_word_check():
+    assert load_words(os.devnull + '.missing') == frozenset()
+    assert 'infrequent' in load_words()
@@ -0,0 +1,216 @@
+"""Instant symptom triage from a precomputed, memory-mapped inverted index.
+
+A model analysis takes seconds; this answers in well under a millisecond so
+the page can show likely conditions while the model is still working.
+`triage_conditions.json` lists conditions with weighted symptoms (3 hallmark,
+2 common, 1 sometimes), red-flag symptoms and lay-language aliases.
+`python triage_index.py` compiles it into `triage_index.bin`:
+
+    header      magic, version, condition/term/posting counts
+    conditions  name, total symptom weight, urgent flag
+    terms       sorted by UTF-8 bytes: text, postings range, canonical term,
+                red-flag flag; aliases share their canonical term's postings
+    postings    (condition, weight) pairs
+    strings     condition names and term texts
+
+`TriageIndex` maps the file read-only and binary-searches the term table in
+place. It ranks symptoms already reduced to canonical IDs by
+symptom_normalizer.py, which also drops negated ones ("no rash"). A
+condition scores by the share of its symptom weight that matched, damped
+by how few of the patient's symptoms it explains. Attention is advised for
+any red flag, or when an urgent condition ranks near the top.
+"""
+import json
+import mmap
+import os
+import struct
+import time
+
+from symptom_normalizer import SOURCE, phrase
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+INDEX_PATH = os.path.join(ROOT, 'triage_index.bin')
+
+MAGIC = b'TRIX'
+FORMAT_VERSION = 1
+# magic, version, conditions, terms, postings
+HEADER = struct.Struct('<4sHHII')
+# name offset, total weight, name length, flags
+CONDITION = struct.Struct('<IHBB')
+# text offset, first posting, posting count, canonical term, text length, flags
+TERM = struct.Struct('<IIHHBB')
+# condition, weight
+POSTING = struct.Struct('<HH')
+URGENT = 1  # condition flag
+RED_FLAG = 1  # term flag
+
+MAX_CANDIDATES = 5
+# An urgent condition this high in the top three advises medical attention
+URGENT_SCORE = 0.35
+URGENT_RANK = 3
+
+
+def build_index(source=SOURCE, output=INDEX_PATH):
+    """Compile the condition list into the binary index; returns its size"""
+    with open(source, encoding='utf-8') as f:
+        data = json.load(f)
+    conditions = data['conditions']
+
+    postings = {}  # canonical term -> [(condition, weight)]
+    for cid, condition in enumerate(conditions):
+        for term, weight in condition['symptoms'].items():
+            postings.setdefault(phrase(term), []).append((cid, weight))
+    red_flags = {phrase(term) for term in data['red_flags']}
+    for term in red_flags:
+        postings.setdefault(term, [])
+    canonical_of = {term: term for term in postings}
+    for alias, canonical in data['aliases'].items():
+        alias, canonical = phrase(alias), phrase(canonical)
+        if canonical not in postings:
+            raise ValueError(f"Alias {alias!r} points at unknown symptom {canonical!r}")
+        if alias in canonical_of and canonical_of[alias] != canonical:
+            raise ValueError(f"Alias {alias!r} shadows a symptom")
+        canonical_of[alias] = canonical
+
+    strings = bytearray()
+
+    def intern(text):
+        encoded = text.encode('utf-8')
+        offset = len(strings)
+        strings.extend(encoded)
+        return offset, len(encoded)
+
+    posting_blob = bytearray()
+    first_posting = {}
+    for term in sorted(postings):
+        first_posting[term] = len(posting_blob) // POSTING.size
+        for cid, weight in postings[term]:
+            posting_blob += POSTING.pack(cid, weight)
+
+    terms = sorted(canonical_of, key=lambda t: t.encode('utf-8'))
+    position = {term: i for i, term in enumerate(terms)}
+    out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, len(conditions), len(terms),
+                                len(posting_blob) // POSTING.size))
+    for condition in conditions:
+        offset, length = intern(condition['name'])
+        out += CONDITION.pack(offset, sum(condition['symptoms'].values()), length,
+                              URGENT if condition.get('urgent') else 0)
+    for term in terms:
+        canonical = canonical_of[term]
+        offset, length = intern(term)
+        out += TERM.pack(offset, first_posting[canonical], len(postings[canonical]),
+                         position[canonical], length,
+                         RED_FLAG if canonical in red_flags else 0)
+    out += posting_blob
+    out += strings
+    with open(output, 'wb') as f:
+        f.write(out)
+    return len(out)
+
+
+class TriageIndex:
+    """Read-only view of triage_index.bin"""
+
+    def __init__(self, path=INDEX_PATH):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_conditions, n_terms, n_postings = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} triage index")
+        self.term_count = n_terms
+        self._terms_at = HEADER.size + n_conditions * CONDITION.size
+        self._postings_at = self._terms_at + n_terms * TERM.size
+        self._strings_at = self._postings_at + n_postings * POSTING.size
+        # A few dozen conditions; decode them once rather than per request
+        self.conditions = []
+        for cid in range(n_conditions):
+            offset, total, length, flags = CONDITION.unpack_from(
+                self._mm, HEADER.size + cid * CONDITION.size)
+            self.conditions.append((self._string(offset, length).decode('utf-8'),
+                                    total, bool(flags & URGENT)))
+
+    def _string(self, offset, length):
+        start = self._strings_at + offset
+        return self._mm[start:start + length]
+
+    def _term(self, i):
+        return TERM.unpack_from(self._mm, self._terms_at + i * TERM.size)
+
+    def term_text(self, i):
+        """Return the text of the i-th term"""
+        offset, _, _, _, length, _ = self._term(i)
+        return self._string(offset, length).decode('utf-8')
+
+    def lookup(self, phrase):
+        """Return the index of the canonical term for a phrase, or -1"""
+        key = phrase.encode('utf-8')
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset, _, _, canonical, length, _ = self._term(mid)
+            text = self._string(offset, length)
+            if text == key:
+                return canonical
+            if text < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return -1
+
+    def triage(self, normalized, extra_terms=()):
+        """Rank candidate conditions for normalised symptoms"""
+        started = time.perf_counter()
+        matched = {self.lookup(term) for term in normalized.present}
+        matched.update(self.lookup(term) for term in extra_terms)
+        matched.discard(-1)
+
+        weights, support, red_flags = {}, {}, []
+        for term in matched:
+            _, first, count, _, _, flags = self._term(term)
+            text = self.term_text(term)
+            if flags & RED_FLAG:
+                red_flags.append(text)
+            base = self._postings_at + first * POSTING.size
+            for k in range(count):
+                cid, weight = POSTING.unpack_from(self._mm, base + k * POSTING.size)
+                weights[cid] = weights.get(cid, 0) + weight
+                support.setdefault(cid, []).append(text)
+
+        candidates = []
+        for cid, weight in weights.items():
+            name, total, urgent = self.conditions[cid]
+            explained = len(support[cid]) / len(matched)
+            score = weight / total * explained ** 0.5
+            candidates.append({'name': name, 'confidence': round(score * 100),
+                               'urgent': urgent, 'matched': sorted(support[cid])})
+        candidates.sort(key=lambda c: (-c['confidence'], c['name']))
+        candidates = candidates[:MAX_CANDIDATES]
+
+        seek_attention = bool(red_flags) or any(
+            c['urgent'] and c['confidence'] >= URGENT_SCORE * 100
+            for c in candidates[:URGENT_RANK])
+        return {
+            'candidates': candidates,
+            'seek_medical_attention': seek_attention,
+            'red_flags': sorted(red_flags),
+            'matched_symptoms': sorted(self.term_text(t) for t in matched),
+            'negated_symptoms': list(normalized.negated),
+            'unmatched_symptoms': list(normalized.unmatched),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+        }
+
+
+def load_triage_index(path=INDEX_PATH):
+    """Return the triage index, or None if it is missing or unreadable"""
+    try:
+        return TriageIndex(path)
+    except (OSError, ValueError) as e:
+        print(f"Triage index unavailable ({e}); /triage is disabled")
+        return None
+
+
+if __name__ == '__main__':
+    size = build_index()
+    index = TriageIndex()
+    print(f"Wrote {INDEX_PATH}: {size} bytes, {len(index.conditions)} conditions, "
+          f"{index.term_count} terms")